@@ -0,0 +1,7 @@
+"""
+Benchmarks for the split pipeline. Run them with
+
+    python -m benchmarks --output results.json
+
+see `python -m benchmarks -h` for the options.
+"""
@@ -0,0 +1,80 @@
+import argparse
+import json
+import platform
+import sys
+
+import splitfolders
+
+from .bench import FILESYSTEMS, METHODS, MODES, run_isolated
+from .datasets import DATASETS
+
+
+def _key(result):
+    return tuple(result.get(key) for key in ("dataset", "method", "mode", "workers", "executor", "engine", "fs"))
+
+
+def _row(result, baseline=None):
+    phases = " ".join(f"{name}={seconds:.3f}s" for name, seconds in result["phases"].items())
+    rss = f"{result['peak_rss'] / 2**20:.0f} MiB" if result["peak_rss"] is not None else "-"
+    row = (
+        f"{result['dataset']:<13} {result['method']:<6} {result['mode']:<9}"
+        f" {result['files_per_sec']:>10.0f} files/s {result['bytes_per_sec'] / 2**20:>9.1f} MiB/s"
+        f" {rss:>9}  {phases}"
+    )
+    if baseline is not None and baseline.get("files_per_sec"):
+        row += f"  ({result['files_per_sec'] / baseline['files_per_sec']:.2f}x)"
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Benchmark split-folders on synthetic datasets."
+    )
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=list(METHODS))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=["copy", "symlink", "hardlink"])
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="scale the number of files, e.g. `0.1` for a quick run"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--executor", choices=["thread", "process", "async"], default="thread")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python")
+    parser.add_argument(
+        "--fs",
+        choices=FILESYSTEMS,
+        default="local",
+        help="split on the disk or in memory (`memory`), without disk noise",
+    )
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare files/s with")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = {_key(r): r for r in json.load(f)["results"]}
+
+    results = []
+    for dataset in args.datasets:
+        for method in args.methods:
+            for mode in args.modes:
+                result = run_isolated(
+                    dataset, method, mode, args.scale, args.workers, args.executor, args.engine, args.fs
+                )
+                results.append(result)
+                print(_row(result, baseline.get(_key(result))), file=sys.stderr)
+
+    report = {
+        "version": splitfolders.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Runs the split functions on the synthetic datasets and measures them."""
+
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+import splitfolders
+
+from .datasets import generate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METHODS = ("ratio", "fixed", "kfold")
+
+# transfer mode: value of `move`
+MODES = {"copy": False, "move": True, "symlink": "symlink", "hardlink": "hardlink", "reflink": "reflink"}
+
+# where the datasets are generated and split: a temporary directory or a MemoryFS, without disk noise
+FILESYSTEMS = ("local", "memory")
+
+
+def _peak_rss():
+    """Peak resident set size of this process in bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _input_size(fs, input):
+    num_files = num_bytes = 0
+    dirs, names = fs.scan(input)
+    for name in names:
+        num_files += 1
+        num_bytes += fs.stat(Path(input) / name).st_size
+    for d in dirs:
+        files, size = _input_size(fs, d)
+        num_files += files
+        num_bytes += size
+    return num_files, num_bytes
+
+
+def _split(method, input, output, items, options):
+    if method == "ratio":
+        return splitfolders.ratio(input, output, ratio=(0.8, 0.1, 0.1), **options)
+    if method == "fixed":
+        num = max(1, items // 10)
+        return splitfolders.fixed(input, output, fixed=(num, num), **options)
+    return splitfolders.kfold(input, output, k=5, **options)
+
+
+def run_case(dataset, method, mode, scale=1.0, workers=1, executor="thread", engine="python", fs="local"):
+    """
+    Generates `dataset` in a temporary directory (or a MemoryFS with
+    `fs="memory"`), splits it with `method` and returns the measurements
+    """
+    with tempfile.TemporaryDirectory(prefix="splitfolders-bench-") as tmp:
+        input, output = Path(tmp) / "input", Path(tmp) / "output"
+        filesystem = splitfolders.MemoryFS() if fs == "memory" else splitfolders.LocalFS()
+        items, options = generate(dataset, input, scale, filesystem)
+        num_files, num_bytes = _input_size(filesystem, input)
+        stats = []
+        options = dict(
+            options, move=MODES[mode], workers=workers, executor=executor, engine=engine, metrics=stats.append
+        )
+        if fs == "memory":
+            options["fs"] = filesystem
+        _split(method, input, output, items, options)
+        seconds = stats[0].seconds
+
+    return {
+        "dataset": dataset,
+        "method": method,
+        "mode": mode,
+        "workers": workers,
+        "executor": executor,
+        "engine": engine,
+        "fs": fs,
+        "scale": scale,
+        "files": num_files,
+        "bytes": num_bytes,
+        "seconds": seconds,
+        "files_per_sec": num_files / seconds if seconds else None,
+        "bytes_per_sec": num_bytes / seconds if seconds else None,
+        "peak_rss": _peak_rss(),
+        "phases": dict(stats[0].phases),
+        "skipped": dict(stats[0].skipped),
+        "fallbacks": stats[0].fallbacks,
+    }
+
+
+def run_isolated(*args, **kwargs):
+    """Runs a case in a fresh process, so the peak RSS is that of the case alone"""
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_case, *args, **kwargs).result()
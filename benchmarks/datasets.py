@@ -0,0 +1,73 @@
+"""Synthetic input folders for the benchmarks."""
+
+from pathlib import Path
+
+from splitfolders.fs import LocalFS
+
+CHUNK = 1 << 20
+
+
+def _write(fs, path, size):
+    chunk = b"\0" * min(size, CHUNK)
+    with fs.open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            f.write(chunk[:remaining])
+            remaining -= len(chunk)
+
+
+def class_dirs(fs, root, num_classes, files_per_class, size, suffixes=(".jpg",)):
+    """`num_classes` class folders with `files_per_class` stems each, one file per suffix and stem"""
+    for c in range(num_classes):
+        class_dir = Path(root) / f"class_{c:05d}"
+        fs.mkdir(class_dir)
+        for i in range(files_per_class):
+            for suffix in suffixes:
+                _write(fs, class_dir / f"{i:07d}{suffix}", size)
+    return files_per_class
+
+
+def flat_dir(fs, root, num_files, size):
+    """A single folder with `num_files` files"""
+    fs.mkdir(root)
+    for i in range(num_files):
+        _write(fs, Path(root) / f"{i:07d}.jpg", size)
+    return num_files
+
+
+def sibling_dirs(fs, root, num_files, size, type_dirs=("images", "masks")):
+    """Parallel type folders with the same stems, e.g. images and masks"""
+    for type_dir in type_dirs:
+        fs.mkdir(Path(root) / type_dir)
+        for i in range(num_files):
+            _write(fs, Path(root) / type_dir / f"{i:07d}.png", size)
+    return num_files
+
+
+# name: (generator, arguments, options for the split functions), counts are scaled by `--scale`
+DATASETS = {
+    "tiny_files": (class_dirs, {"num_classes": 10, "files_per_class": 2000, "size": 1 << 10}, {}),
+    "huge_files": (class_dirs, {"num_classes": 2, "files_per_class": 4, "size": 64 << 20}, {}),
+    "many_classes": (class_dirs, {"num_classes": 1000, "files_per_class": 10, "size": 1 << 10}, {}),
+    "flat": (flat_dir, {"num_files": 20000, "size": 1 << 10}, {}),
+    "stem_pairs": (
+        class_dirs,
+        {"num_classes": 10, "files_per_class": 1000, "size": 1 << 10, "suffixes": (".jpg", ".txt")},
+        {"group": "stem"},
+    ),
+    "sibling": (sibling_dirs, {"num_files": 10000, "size": 1 << 10}, {"group": "sibling"}),
+}
+
+# the number of classes is kept, so the shape of a dataset does not change with the scale
+COUNTS = ("files_per_class", "num_files")
+
+
+def generate(name, root, scale=1.0, fs=None):
+    """
+    Writes the dataset `name` into `root` (on the filesystem `fs`, the disk
+    by default) and returns (items, options): the number of items (files or
+    groups) per class and the options to split it
+    """
+    generator, arguments, options = DATASETS[name]
+    arguments = {key: max(4, round(value * scale)) if key in COUNTS else value for key, value in arguments.items()}
+    return generator(fs if fs is not None else LocalFS(), root, **arguments), options
@@ -1,3 +1,10 @@
 __version__ = "0.6.1"
 
+from .filelist import FileListInput  # noqa: F401
+from .fs import LocalFS, MemoryFS  # noqa: F401
+from .plan import Plan, PlanEntry  # noqa: F401
+from .result import SplitResult  # noqa: F401
+from .scancache import ScanCache  # noqa: F401
+from .sinks import ArchiveSink  # noqa: F401
 from .split import *  # noqa: F403
+from .stats import Stats  # noqa: F401
@@ -0,0 +1,196 @@
+"""Archive inputs: split a tar or zip archive as if it was extracted, without extracting it."""
+
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from pathlib import Path, PurePosixPath
+
+from .fs import FileStat
+from .sinks import BUFFER_SIZE
+
+# members with more than one destination (e.g. k-fold) are held in memory up to this size, on disk beyond
+SPOOL_SIZE = 64 << 20
+
+
+def is_archive(path):
+    """Checks if `path` is a tar or zip file (and not a folder)"""
+    path = Path(path)
+    return path.is_file() and (zipfile.is_zipfile(path) or tarfile.is_tarfile(path))
+
+
+def _identical(size, mtime, destination):
+    """Checks if `destination` has the size and modification time of an archive member"""
+    try:
+        st = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    return st.st_size == size and st.st_mtime_ns == int(mtime * 1e9)
+
+
+class ArchiveInput:
+    """
+    The members of a tar or zip archive (also compressed tars) as an input
+    folder. The archive is indexed once, classes are its top-level dirs like
+    in a folder. If everything is inside a single top-level dir, e.g. in
+    `dataset.tar` with `dataset/cats/...`, that dir is the input folder.
+
+    Files inside the archive are addressed as `<archive path>/<member>`, so
+    the split functions list it through `scan` like a folder and plan the
+    split as usual. `extract` then writes the planned files in a single
+    sequential read of the archive.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.format = "zip" if zipfile.is_zipfile(self.path) else "tar"
+        self._dirs = defaultdict(dict)  # dir -> subdirs (a dict keeps them ordered)
+        self._files = defaultdict(list)  # dir -> file names
+        self._members = {}  # file -> (member name, size, mtime)
+        self._index()
+
+    def __repr__(self):
+        return f"ArchiveInput({str(self.path)!r}, {len(self._members)} files)"
+
+    def _infos(self):
+        """Yields (member name, is_file, size, mtime) of all members"""
+        if self.format == "zip":
+            with zipfile.ZipFile(self.path) as z:
+                for info in z.infolist():
+                    # zip archives store the local time
+                    yield info.filename, not info.is_dir(), info.file_size, time.mktime(info.date_time + (0, 0, -1))
+        else:
+            with tarfile.open(self.path) as tar:
+                for info in tar:
+                    if info.isfile() or info.isdir():
+                        yield info.name, info.isfile(), info.size, info.mtime
+
+    def _index(self):
+        files = []
+        for name, is_file, size, mtime in self._infos():
+            parts = PurePosixPath(name).parts
+            if parts and parts[0] == ".":
+                parts = parts[1:]
+            if not parts or parts[0] == "__MACOSX":  # resource forks added by macOS
+                continue
+            if is_file:
+                files.append((parts, name, size, mtime))
+            else:
+                self._add_dirs(parts)
+
+        # a single top-level dir wrapping everything is the input folder
+        tops = {parts[0] for parts, *_ in files} | {d.parts[0] for d in self._dirs.get(PurePosixPath(), {})}
+        strip = len(tops) == 1 and all(len(parts) > 1 for parts, *_ in files)
+        if strip:
+            self._dirs.clear()
+
+        for parts, name, size, mtime in files:
+            if strip:
+                parts = parts[1:]
+            rel = PurePosixPath(*parts)
+            self._add_dirs(parts[:-1])
+            if not rel.name.startswith("."):
+                self._files[rel.parent].append(rel.name)
+                self._members[rel] = (name, size, mtime)
+
+    def _add_dirs(self, parts):
+        for i in range(len(parts)):
+            self._dirs[PurePosixPath(*parts[:i])][PurePosixPath(*parts[: i + 1])] = None
+
+    def _rel(self, path):
+        try:
+            return PurePosixPath(Path(path).relative_to(self.path).as_posix())
+        except ValueError:
+            raise ValueError(f'"{path}" is not inside the archive "{self.path}".') from None
+
+    def exists(self, path):
+        return self.is_dir(path) or self._rel(path) in self._members
+
+    def is_dir(self, path):
+        rel = self._rel(path)
+        return rel == PurePosixPath() or rel in self._dirs.get(rel.parent, ())
+
+    def stat(self, path):
+        """The size and modification time of a file in the archive"""
+        _, size, mtime = self._members[self._rel(path)]
+        return FileStat(size, mtime, int(mtime * 1e9))
+
+    def scan(self, directory):
+        """Lists a dir of the archive like `utils.scan_dir`: (dirs, file names)"""
+        rel = self._rel(directory)
+        if not self.is_dir(directory):
+            raise ValueError(f'The folder "{rel}" does not exist in the archive "{self.path}".')
+        return [self.path / d for d in self._dirs.get(rel, ())], list(self._files.get(rel, ()))
+
+    def _members_in_order(self, wanted):
+        """Yields (member name, file object) of the wanted members in the order of the archive"""
+        if self.format == "zip":
+            with zipfile.ZipFile(self.path) as z:
+                for info in z.infolist():
+                    if info.filename in wanted:
+                        with z.open(info) as f:
+                            yield info.filename, f
+        else:
+            # stream mode, the archive (and its compression) is read once from start to end
+            with tarfile.open(self.path, "r|*") as tar:
+                for info in tar:
+                    if info.name in wanted:
+                        yield info.name, tar.extractfile(info)
+
+    def extract(self, entries, transfer, sink=None, output=None, prog_bar=None):
+        """
+        Writes planned entries (see Plan) with sources in the archive into
+        their destinations, or into the shards of `sink` in `output`, reading
+        the archive once. The files are counted in the result and stats of
+        `transfer`. With its `overwrite="if-changed"`, destinations with the
+        size and modification time of their member are skipped.
+        """
+        # files planned from the output (e.g. oversampled duplicates) are read from their source
+        sources = {Path(e.destination): Path(e.source) for e in entries}
+        wanted, members, sizes = defaultdict(list), {}, []
+        for e in entries:
+            name, size, mtime = self._members[self._rel(sources.get(Path(e.source), e.source))]
+            wanted[name].append(e)
+            members[name] = size, mtime
+            sizes.append(size)
+
+        shards = sink.shards(output, entries, sizes) if sink is not None else None
+        if shards is None:
+            transfer.mkdirs(Path(e.destination).parent for e in entries)
+        try:
+            for name, f in self._members_in_order(wanted):
+                size, mtime = members[name]
+                if len(wanted[name]) > 1:
+                    # read the member once, write it from the spool to each destination
+                    spool = tempfile.SpooledTemporaryFile(SPOOL_SIZE)
+                    shutil.copyfileobj(f, spool, BUFFER_SIZE)
+                    f = spool
+
+                for e in wanted[name]:
+                    if len(wanted[name]) > 1:
+                        f.seek(0)
+                    status = None
+                    if shards is not None:
+                        destination = shards.add(e, lambda w, member: w.add_fileobj(f, member, size, mtime))
+                    elif transfer.overwrite == "if-changed" and _identical(size, mtime, e.destination):
+                        destination, status = Path(e.destination), "identical"
+                    else:
+                        destination = Path(e.destination)
+                        with open(destination, "wb") as f_dst:
+                            shutil.copyfileobj(f, f_dst, BUFFER_SIZE)
+                        if transfer.preserve_metadata != "none":
+                            mtime_ns = int(mtime * 1e9)
+                            os.utime(destination, ns=(mtime_ns, mtime_ns))
+                    transfer._record([(e.split, e.label, size, status, destination)])
+                    if prog_bar is not None:
+                        prog_bar.update()
+                f.close()
+        except BaseException:
+            if shards is not None:
+                shards.close(failed=True)
+            raise
+        if shards is not None:
+            shards.close()
@@ -1,5 +1,7 @@
 import argparse
 
+from .archive import is_archive
+from .sinks import ArchiveSink
 from .split import fixed, kfold, ratio
 
 
@@ -50,6 +52,15 @@ def run():
         action="store_true",
         help="enable oversampling of imbalanced datasets",
     )
+    parser.add_argument(
+        "--oversample_mode",
+        choices=["hardlink", "symlink", "manifest"],
+        default=None,
+        help=(
+            "oversample with hardlinks or symlinks to the train files instead of copies, or only write"
+            " the number of copies per train file to `oversample.csv` (`manifest`). Implies --oversample."
+        ),
+    )
     parser.add_argument(
         "--group_prefix",
         type=int,
@@ -73,12 +84,23 @@ def run():
         action="store_true",
         help="symlink(create shortcut) the files instead of copying",
     )
+    move_group.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="hardlink the files instead of copying, falls back to copying across devices",
+    )
+    move_group.add_argument(
+        "--reflink",
+        action="store_true",
+        help="copy-on-write clone the files (e.g. btrfs, XFS), falls back to copying",
+    )
     parser.add_argument(
         "input",
         help=(
             "directory with the input data. The directory needs to have the labels"
             " as sub-directories. In those sub-directories are then the actual files"
-            " that gets split."
+            " that gets split. Can also be a tar or zip archive, or a `.csv` or `.jsonl`"
+            " file listing the files with `path`, `label` and optionally `group`."
         ),
     )
     parser.add_argument(
@@ -94,19 +116,222 @@ def run():
         default=False,
         help="do not shuffle files before splitting (useful for time series data)",
     )
+    parser.add_argument(
+        "--assignment",
+        choices=["random", "hash"],
+        default="random",
+        help=(
+            "how files are assigned to splits: `random` shuffles them with the seed (default),"
+            " `hash` places each file by a hash of its path so adding files never moves existing ones."
+            " Not available with --fixed."
+        ),
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "copy files while the input is scanned instead of listing it first, keeps the memory"
+            " bounded for huge directories. Requires --ratio and --assignment hash, no grouping."
+        ),
+    )
+    parser.add_argument(
+        "--fold_store",
+        choices=["symlink", "hardlink", "manifest"],
+        default=None,
+        help=(
+            "with --kfold, transfer each file once into `folds/partition_j/` and build the folds from"
+            " symlinks, hardlinks or `fold_i/train.txt` / `val.txt` file lists pointing into it"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["python", "numpy"],
+        default="python",
+        help="shuffle with Python's `random` (default) or NumPy's Generator, which is faster for millions of files",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of files to copy in parallel, defaults to 1",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["thread", "process", "async"],
+        default="thread",
+        help=(
+            "run parallel copies in a thread pool (default), a process pool"
+            " or from an asyncio event loop (for high latency network filesystems)"
+        ),
+    )
+    parser.add_argument(
+        "--sink",
+        choices=["tar", "zip"],
+        default=None,
+        help="write each split into tar or zip shards in the output directory instead of folders",
+    )
+    parser.add_argument(
+        "--shard_size",
+        type=int,
+        default=None,
+        help="with --sink, the maximum size of a shard in bytes, a new shard is started when it is reached",
+    )
+    parser.add_argument(
+        "--shard_per_class",
+        action="store_true",
+        help="with --sink, write separate shards per split and class",
+    )
+    parser.add_argument(
+        "--overwrite",
+        choices=["always", "if-changed", "if-changed-hash"],
+        default="always",
+        help=(
+            "when rerunning into an existing output, copy files `always` (default) or skip destinations with the"
+            " same size and modification time (`if-changed`) or the same size and content (`if-changed-hash`)"
+        ),
+    )
+    parser.add_argument(
+        "--preserve_metadata",
+        choices=["none", "times", "full"],
+        default="full",
+        help=(
+            "what copies keep of their source: `full` (default) permissions, times and extended attributes,"
+            " only the access and modification `times` or `none`"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "keep a journal of the split in the output directory and, if an earlier run with the same"
+            " options was interrupted, only transfer the files it did not finish"
+        ),
+    )
+    parser.add_argument(
+        "--num_shards",
+        type=int,
+        default=1,
+        help=(
+            "split the job over this many runs (e.g. on several machines), each run with the same options"
+            " and its own --shard_index transfers a disjoint part of the same split"
+        ),
+    )
+    parser.add_argument(
+        "--shard_index",
+        type=int,
+        default=0,
+        help="with --num_shards, the part of the split this run transfers, from 0 to num_shards - 1",
+    )
+    parser.add_argument(
+        "--shard_by",
+        choices=["count", "bytes"],
+        default="count",
+        help="with --num_shards, balance the parts by their number of files (default) or their size",
+    )
+    parser.add_argument(
+        "--scan_cache",
+        action="store_true",
+        help=(
+            "keep the listings of the input folders in the user cache folder and only scan the"
+            " folders again that changed since the last split"
+        ),
+    )
+    parser.add_argument(
+        "--scan_cache_file",
+        default=None,
+        metavar="FILE",
+        help="keep the scan cache in FILE instead of the user cache folder. Implies --scan_cache.",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="do not copy any files, write the planned split to this file instead (`.csv` or `.jsonl`)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print the time per phase and the files and bytes per split",
+    )
+    parser.add_argument(
+        "--stats_file",
+        default=None,
+        metavar="FILE",
+        help="write the statistics of --stats as JSON to FILE instead of printing them. Implies --stats.",
+    )
 
     args = parser.parse_args()
 
     if args.group_prefix is not None and args.group is not None:
         parser.error("--group_prefix and --group are mutually exclusive.")
 
+    if args.assignment != "random" and args.fixed:
+        parser.error("--assignment hash cannot be combined with --fixed.")
+
+    if args.stream and not args.ratio:
+        parser.error("--stream can only be used with --ratio.")
+
+    if args.stream and args.assignment != "hash":
+        parser.error("--stream requires --assignment hash.")
+
+    if args.stream and (args.group_prefix is not None or args.group is not None):
+        parser.error("--stream cannot be combined with --group_prefix or --group.")
+
+    if args.fold_store is not None and not args.kfold:
+        parser.error("--fold_store can only be used with --kfold.")
+
+    if args.num_shards > 1 and args.move:
+        parser.error("--num_shards cannot be combined with --move, every run lists the input.")
+
+    if args.sink is None and (args.shard_size is not None or args.shard_per_class):
+        parser.error("--shard_size and --shard_per_class can only be used with --sink.")
+
+    if args.oversample_mode is not None:
+        args.oversample = args.oversample_mode
+
     if args.symlink:
         args.move = "symlink"
+    elif args.hardlink:
+        args.move = "hardlink"
+    elif args.reflink:
+        args.move = "reflink"
+
+    if args.sink is not None and args.move:
+        parser.error("--sink cannot be combined with --move, --symlink, --hardlink or --reflink.")
 
     shuffle = not args.no_shuffle
+    options = {
+        "workers": args.workers,
+        "executor": args.executor,
+        "dry_run": args.manifest is not None,
+        "engine": args.engine,
+        "overwrite": args.overwrite,
+        "preserve_metadata": args.preserve_metadata,
+        "num_shards": args.num_shards,
+        "shard_index": args.shard_index,
+        "shard_by": args.shard_by,
+    }
+    stats = []
+    if args.stats or args.stats_file is not None:
+        options["metrics"] = stats.append
+
+    if args.ratio or args.kfold:
+        options["assignment"] = args.assignment
+    if args.stream:
+        options["stream"] = True
+    if args.fold_store is not None:
+        options["fold_store"] = args.fold_store
+    if args.resume:
+        options["resume"] = True
+    if args.scan_cache_file is not None:
+        options["scan_cache"] = args.scan_cache_file
+    elif args.scan_cache:
+        options["scan_cache"] = True
+    if args.sink is not None:
+        options["sink"] = ArchiveSink(args.sink, args.shard_size, args.shard_per_class)
 
     if args.ratio:
-        ratio(
+        result = ratio(
             args.input,
             args.output,
             args.seed,
@@ -116,13 +341,14 @@ def run():
             args.move,
             args.formats,
             shuffle,
+            **options,
         )
     elif args.fixed:
         if args.fixed == ["auto"]:
             fixed_value = "auto"
         else:
             fixed_value = [int(x) for x in args.fixed]
-        fixed(
+        result = fixed(
             args.input,
             args.output,
             args.seed,
@@ -133,18 +359,29 @@ def run():
             args.move,
             args.formats,
             shuffle,
+            **options,
         )
     elif args.kfold:
-        kfold(
+        result = kfold(
             args.input,
             args.output,
             args.seed,
             args.kfold,
             args.group_prefix,
             args.group,
-            args.move if args.move else "symlink",
+            args.move if args.move or args.sink or is_archive(args.input) else "symlink",
             args.formats,
             shuffle,
+            **options,
         )
     else:
         print("Please specify either your `--ratio`, `--fixed`, or `--kfold` for the split. see -h for more help.")
+        return
+
+    if args.manifest is not None:
+        result.write(args.manifest)
+
+    if args.stats_file is not None:
+        stats[0].write(args.stats_file)
+    elif args.stats:
+        print(stats[0].summary())
@@ -0,0 +1,42 @@
+"""
+Shuffling engines. `"python"` (default) shuffles with the `random` module,
+`"numpy"` with a permutation from NumPy's Generator, which is much faster for
+millions of files. NumPy is optional and only imported here.
+"""
+
+from array import array
+
+try:
+    import numpy as np
+
+    use_numpy = True
+except ImportError:
+    use_numpy = False
+
+ENGINES = ("python", "numpy")
+
+
+def valid_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid value for engine: {engine!r}. Use 'python' or 'numpy'.")
+    if engine == "numpy" and not use_numpy:
+        raise ValueError("`engine='numpy'` requires NumPy, install it with `pip install numpy`.")
+
+
+def permutation(n, seed):
+    """
+    The order of the numpy engine: `numpy.random.default_rng(seed).permutation(n)`.
+    It is the same for a seed on every platform, NumPy only reserves the right
+    to change the streams of its Generator between (major) versions.
+    """
+    return np.random.default_rng(seed).permutation(n)
+
+
+def shuffle_numpy(files, seed):
+    """Shuffles a FileIndex or a list in place with `permutation`"""
+    perm = permutation(len(files), seed)
+    if isinstance(files, list):
+        files[:] = [files[i] for i in perm]
+    else:
+        # the order of a FileIndex is an array of uint64, permuted without Python objects
+        files.order = array("Q", np.frombuffer(files.order, dtype=np.uint64)[perm].tobytes())
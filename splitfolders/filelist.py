@@ -0,0 +1,172 @@
+"""File list inputs: split files listed with their labels (e.g. by a catalog) without scanning any folder."""
+
+import csv
+import json
+import os
+from collections import defaultdict
+from pathlib import Path, PurePath
+
+from .plan import Plan
+
+FILE_LIST_FORMATS = (".csv", ".jsonl")
+
+# the root of the files of a file list that was not read from a file
+FILE_LIST_ROOT = "file-list"
+
+
+def is_file_list(input, fs=None):
+    """
+    Checks if `input` is a file list: a FileListInput, an iterable of records
+    or a `.csv` or `.jsonl` file (and not a folder)
+    """
+    if isinstance(input, FileListInput):
+        return True
+    if not isinstance(input, (str, os.PathLike)):
+        return True
+    path = Path(input)
+    if path.suffix not in FILE_LIST_FORMATS:
+        return False
+    return path.is_file() if fs is None else fs.exists(path) and not fs.is_dir(path)
+
+
+def _record(record):
+    """Returns (path, label, group) of a record, labels and groups are None if empty"""
+    if isinstance(record, (str, os.PathLike)):
+        path, label, group = record, None, None
+    elif isinstance(record, dict):
+        if "path" not in record and "source" not in record:
+            raise ValueError(f"File list records need a `path`, got {record!r}.")
+        path = record["path"] if "path" in record else record["source"]
+        label, group = record.get("label"), record.get("group")
+    elif len(record) in (2, 3):
+        path, label, group = (*record, None)[:3]
+    else:
+        raise ValueError(f"File list records are (path, label) or (path, label, group), got {record!r}.")
+    if label in (None, ""):
+        label = None
+    elif str(label) != PurePath(str(label)).name:
+        raise ValueError(f"Labels of a file list are folder names, got {label!r}.")
+    else:
+        label = str(label)
+    return path, label, group if group not in (None, "") else None
+
+
+class FileListInput:
+    """
+    Files listed as records of (path, label[, group]) as an input folder, so
+    the split functions do not scan any folder. A record is a path, a tuple
+    or a dict with `path` (or `source`, like in Plan manifests), `label` and
+    optionally `group` keys. `read` loads them from a CSV file with a header
+    row or a JSONL file. Relative paths are taken from the working directory.
+
+    The labels are the classes, without labels the list is split like a flat
+    folder. Files with the same group (within a class) are kept together.
+    Within a class the names of the files must be unique, they become the
+    names in the output folder.
+
+    Like an archive.ArchiveInput, the files are addressed as
+    `<root>/<label>/<name>`, so the split functions list them through `scan`
+    and plan the split as usual. `resolve` maps the planned entries to the
+    listed paths.
+    """
+
+    def __init__(self, records, root=FILE_LIST_ROOT, fs=None):
+        self.root = Path(root)
+        self.groups = False
+        self._fs = fs
+        self._dirs = {}  # labels (a dict keeps them ordered)
+        self._files = defaultdict(list)  # label -> file names
+        self._paths = {}  # file -> listed path
+        self._group = {}  # file -> group
+        self._add(records)
+
+    def __repr__(self):
+        return f"FileListInput({str(self.root)!r}, {len(self._paths)} files)"
+
+    @classmethod
+    def read(cls, path, fs=None):
+        """Reads a file list from a `.csv` or `.jsonl` file, the file is the root of its files"""
+        path = Path(path)
+        if path.suffix not in FILE_LIST_FORMATS:
+            raise ValueError(f'Unknown file list format "{path.suffix}". Use ".csv" or ".jsonl".')
+        with open(path, newline="") if fs is None else fs.open(path, "r", newline="") as f:
+            if path.suffix == ".csv":
+                return cls(csv.DictReader(f), path, fs)
+            return cls((json.loads(line) for line in f if line.strip()), path, fs)
+
+    def _add(self, records):
+        labeled = None
+        for record in records:
+            path, label, group = _record(record)
+            if labeled is None:
+                labeled = label is not None
+            elif labeled != (label is not None):
+                raise ValueError(f'Either all or no files of a file list need a label, "{path}" differs.')
+
+            name = PurePath(path).name
+            file = str(self.root / label / name) if labeled else str(self.root / name)
+            if file in self._paths:
+                raise ValueError(
+                    f'"{self._paths[file]}" and "{path}" have the same name in class {label!r} of the file list.'
+                )
+            self._paths[file] = path
+            if labeled:
+                self._dirs[label] = None
+            self._files[label].append(name)
+            if group is not None:
+                self._group[file] = group
+                self.groups = True
+
+    def _label(self, path):
+        """Returns the label of a folder of the file list, None for the root, or raises KeyError"""
+        path = Path(path)
+        if path == self.root:
+            return None
+        if path.parent == self.root and path.name in self._dirs:
+            return path.name
+        raise KeyError(path)
+
+    def exists(self, path):
+        return self.is_dir(path) or str(Path(path)) in self._paths
+
+    def is_dir(self, path):
+        try:
+            self._label(path)
+        except KeyError:
+            return False
+        return True
+
+    def stat(self, path):
+        """The stat of the listed file (on `fs`)"""
+        src = self._paths[str(Path(path))]
+        return os.stat(src) if self._fs is None else self._fs.stat(src)
+
+    def scan(self, directory):
+        """Lists a folder of the file list like `utils.scan_dir`: (dirs, file names)"""
+        try:
+            label = self._label(directory)
+        except KeyError:
+            raise ValueError(f'The folder "{directory}" does not exist in the file list.') from None
+        dirs = [self.root / d for d in self._dirs] if label is None else []
+        return dirs, list(self._files.get(label, ()))
+
+    def group(self, files):
+        """
+        Groups files by the groups of the file list, usable as `group` of the
+        split functions. Files without a group are a group of their own.
+        """
+        groups = {}
+        for f in files:
+            key = self._group.get(str(f))
+            groups.setdefault(("file", f) if key is None else ("group", key), []).append(f)
+        return [tuple(sorted(g)) for g in sorted(groups.values(), key=min)]
+
+    def resolve(self, entries):
+        """Returns planned entries (see Plan) with the listed paths as sources, a Plan keeps its `dirs`"""
+        paths = self._paths
+        resolved = [e._replace(source=Path(paths[str(e.source)])) if str(e.source) in paths else e for e in entries]
+        if not isinstance(entries, Plan):
+            return resolved
+        plan = Plan(resolved)
+        plan.dirs = entries.dirs
+        return plan
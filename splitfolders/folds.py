@@ -0,0 +1,50 @@
+"""Shared fold store for kfold: every file is transferred once into `folds/`, the folds only link to it."""
+
+from pathlib import Path
+
+from .plan import PlanEntry
+
+STORE_DIR = "folds"
+
+FOLD_STORES = ("symlink", "hardlink", "manifest")
+
+
+def partition_name(j):
+    """The split name of the j-th partition in the store, e.g. `folds/partition_1`"""
+    return f"{STORE_DIR}/partition_{j + 1}"
+
+
+def fold_views(store, k, output):
+    """
+    Maps the planned store (entries of the splits `folds/partition_j`) to the
+    k folds: the val split of fold i is partition i, train all other
+    partitions. Returns plan entries whose source is the file in the store.
+    """
+    partitions = {partition_name(j): [] for j in range(k)}
+    for e in store:
+        partitions[e.split].append(e)
+
+    views, group, previous = [], -1, None
+    for i in range(k):
+        for j, part in enumerate(partitions.values()):
+            split = f"fold_{i + 1}/val" if i == j else f"fold_{i + 1}/train"
+            for e in part:
+                # groups are numbered again since every group shows up in all folds
+                if (split, e.group) != previous:
+                    group += 1
+                    previous = (split, e.group)
+                rel = Path(e.destination).relative_to(Path(output) / partition_name(j))
+                views.append(PlanEntry(e.destination, Path(output) / split / rel, split, e.label, group))
+    return views
+
+
+def write_fold_lists(views, output):
+    """Writes the files of each fold view as `fold_i/train.txt` and `fold_i/val.txt`, relative to `output`"""
+    lists = {}
+    for e in views:
+        lists.setdefault(e.split, []).append(Path(e.source).relative_to(output).as_posix())
+    for split, paths in lists.items():
+        path = Path(output) / f"{split}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            f.writelines(p + "\n" for p in paths)
@@ -0,0 +1,361 @@
+"""
+Filesystems: the storage the split functions list the input from and write
+the output to. A filesystem has the methods of LocalFS: `scan`, `exists`,
+`is_dir`, `stat`, `open`, `mkdir`, `copy`, `link` and `move`.
+"""
+
+import errno
+import io
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from .utils import scan_dir
+
+# ioctl request to share the extents of one file with another (Linux, e.g. btrfs and XFS)
+FICLONE = 0x40049409
+
+# what copies keep of their source besides the content: nothing, the access and modification
+# times, or also the permissions, flags and extended attributes (like `shutil.copy2`)
+PRESERVE_METADATA = ("none", "times", "full")
+
+# bytes per copy_file_range/sendfile call, a single call for most files
+COPY_CHUNK = 1 << 30
+
+# buffer size if neither can copy a file
+COPY_BUFFER = 1 << 20
+
+# errors of copy_file_range (and sendfile) for files it cannot copy, e.g. across filesystems on
+# older kernels, but the next way can
+NO_COPY_RANGE = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.EBADF}
+
+# the fields of `os.stat_result` the split functions use
+FileStat = namedtuple("FileStat", ["st_size", "st_mtime", "st_mtime_ns"])
+
+
+def _reflink(src, dst, metadata="full"):
+    """Creates dst as a copy-on-write clone of src, falls back to a regular copy."""
+    try:
+        import fcntl
+    except ImportError:
+        _copy_file(src, dst, metadata)
+        return "fallback"
+
+    with open(src, "rb", buffering=0) as f_src:
+        st = os.fstat(f_src.fileno())
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o666)
+        try:
+            st_dst = os.fstat(fd)
+            if os.path.samestat(st, st_dst):  # truncating dst would empty src, e.g. a hardlink of an earlier split
+                raise shutil.SameFileError(f"{str(src)!r} and {str(dst)!r} are the same file")
+            if st_dst.st_size:
+                os.ftruncate(fd, 0)
+            try:
+                fcntl.ioctl(fd, FICLONE, f_src.fileno())
+                cloned = True
+            except OSError:  # e.g. across filesystems or not supported by the filesystem
+                cloned = False
+        finally:
+            os.close(fd)
+    if not cloned:
+        _copy_file(src, dst, metadata)
+        return "fallback"
+    _copy_metadata(src, dst, metadata)
+
+
+def _copy_file(src, dst, metadata="full"):
+    """
+    Copies the content of `src` to `dst` in the kernel, without userspace
+    buffers: with copy_file_range (which can share extents or copy on the
+    server, e.g. NFS 4.2) or sendfile on Linux, as `shutil.copyfile` does
+    elsewhere. Then copies the `metadata` (see PRESERVE_METADATA).
+    """
+    if not hasattr(os, "copy_file_range"):
+        shutil.copyfile(src, dst)
+        _copy_metadata(src, dst, metadata)
+        return
+
+    with open(src, "rb", buffering=0) as f_src:
+        st = os.fstat(f_src.fileno())
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o666)
+        try:
+            st_dst = os.fstat(fd)
+            if os.path.samestat(st, st_dst):  # e.g. a symlink to the source left by an earlier split
+                raise shutil.SameFileError(f"{str(src)!r} and {str(dst)!r} are the same file")
+            if st_dst.st_size:
+                os.ftruncate(fd, 0)
+            _copy_fd(f_src.fileno(), fd, st.st_size)
+            if metadata == "times":
+                os.utime(fd, ns=(st.st_atime_ns, st.st_mtime_ns))
+        finally:
+            os.close(fd)
+    if metadata == "full":
+        shutil.copystat(src, dst)
+
+
+def _copy_fd(fd_src, fd_dst, size):
+    offset = 0
+    try:
+        while offset < size:
+            n = os.copy_file_range(fd_src, fd_dst, min(COPY_CHUNK, size - offset), offset, offset)
+            if n == 0:
+                break
+            offset += n
+    except OSError as e:
+        if offset > 0 or e.errno not in NO_COPY_RANGE:
+            raise
+    if offset > 0:
+        return
+    # not supported, or nothing copied from files without a size like in /proc
+    try:
+        while n := os.sendfile(fd_dst, fd_src, offset, COPY_CHUNK):
+            offset += n
+    except OSError as e:
+        if offset > 0 or e.errno not in NO_COPY_RANGE:
+            raise
+        while chunk := os.read(fd_src, COPY_BUFFER):
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(fd_dst, view) :]
+
+
+def _copy_metadata(src, dst, metadata):
+    if metadata == "times":
+        st = os.stat(src)
+        os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+    elif metadata == "full":
+        shutil.copystat(src, dst)
+
+
+class LocalFS:
+    """
+    The local disk, used when no `fs` is given. Errors are the `OSError`s of
+    `os` and `shutil`, other filesystems raise the same ones (e.g.
+    `FileExistsError` when linking to an existing path).
+    """
+
+    def __repr__(self):
+        return "LocalFS()"
+
+    def scan(self, directory):
+        """Lists a directory like `utils.scan_dir`: (dirs, file names)"""
+        dirs, files = scan_dir(directory)
+        return dirs, [f.name for f in files]
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def is_dir(self, path):
+        return os.path.isdir(path)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def open(self, path, mode="r", **kwargs):
+        return open(path, mode, **kwargs)
+
+    def mkdir(self, path):
+        """Creates a directory and its parents, if missing"""
+        os.makedirs(path, exist_ok=True)
+
+    def copy(self, src, dst, clone=False, metadata="full"):
+        """
+        Copies the file `src` to `dst` and its `metadata` (see
+        PRESERVE_METADATA), as a copy-on-write clone with `clone=True`.
+        Returns "fallback" if the clone was not possible and the file was
+        copied.
+        """
+        if clone:
+            return _reflink(src, dst, metadata)
+        _copy_file(src, dst, metadata)
+
+    def link(self, src, dst, symbolic=False):
+        """Hardlinks (or symlinks) `src` to `dst`"""
+        if symbolic:
+            os.symlink(Path(src).resolve(), dst)
+        else:
+            os.link(src, dst)
+
+    def move(self, src, dst):
+        shutil.move(str(src), str(dst))
+
+
+class _File:
+    def __init__(self, data, mtime_ns):
+        self.data = data
+        self.mtime_ns = mtime_ns
+
+
+class _Link:
+    def __init__(self, target):
+        self.target = target
+
+
+class _Dir:
+    def __init__(self):
+        self.children = {}  # name -> None, a dict keeps them ordered
+
+
+class _Writer(io.BytesIO):
+    """A file opened for writing in a MemoryFS, stored when closed"""
+
+    def __init__(self, fs, path):
+        super().__init__()
+        self._fs = fs
+        self._path = path
+
+    def close(self):
+        if not self.closed:
+            self._fs.write_file(self._path, self.getvalue())
+        super().close()
+
+
+class MemoryFS:
+    """
+    A filesystem held in memory, e.g. to test or benchmark the split logic
+    without disk I/O. Paths are taken as given (POSIX-style, not resolved
+    against the working directory). Copies share the content of their source,
+    hardlinks the file itself.
+
+    Fill it with `write_file` and read it back with `read_file` or `scan`.
+    Threads can share it, worker processes cannot (`executor="process"`).
+    """
+
+    def __init__(self):
+        self._nodes = {".": _Dir(), "/": _Dir()}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"MemoryFS({sum(isinstance(n, _File) for n in self._nodes.values())} files)"
+
+    @staticmethod
+    def _key(path):
+        return os.path.normpath(os.fspath(path))
+
+    @staticmethod
+    def _parent(key):
+        return os.path.dirname(key) or "."
+
+    def _resolve(self, path):
+        """Returns the node at `path`, following symlinks"""
+        key = self._key(path)
+        node = self._nodes.get(key)
+        while isinstance(node, _Link):
+            key = node.target
+            node = self._nodes.get(key)
+        if node is None:
+            raise FileNotFoundError(f"No such file or directory: {str(path)!r}")
+        return node
+
+    def _file(self, path):
+        node = self._resolve(path)
+        if isinstance(node, _Dir):
+            raise IsADirectoryError(f"Is a directory: {str(path)!r}")
+        return node
+
+    def _put(self, path, node, replace=True):
+        key = self._key(path)
+        with self._lock:
+            parent = self._nodes.get(self._parent(key))
+            if parent is None:
+                raise FileNotFoundError(f"No such file or directory: {str(path)!r}")
+            if not isinstance(parent, _Dir):
+                raise NotADirectoryError(f"Not a directory: {self._parent(key)!r}")
+            if key in self._nodes and (not replace or isinstance(self._nodes[key], _Dir)):
+                raise FileExistsError(f"File exists: {str(path)!r}")
+            self._nodes[key] = node
+            parent.children[os.path.basename(key)] = None
+
+    def _pop(self, path):
+        key = self._key(path)
+        with self._lock:
+            if key not in self._nodes:
+                raise FileNotFoundError(f"No such file or directory: {str(path)!r}")
+            del self._nodes[self._parent(key)].children[os.path.basename(key)]
+            return self._nodes.pop(key)
+
+    def write_file(self, path, data=b"", mtime=None):
+        """Creates (or replaces) the file `path` with `data`, creating missing parents"""
+        self.mkdir(self._parent(self._key(path)))
+        mtime_ns = time.time_ns() if mtime is None else int(mtime * 1e9)
+        self._put(path, _File(bytes(data), mtime_ns))
+
+    def read_file(self, path):
+        return self._file(path).data
+
+    def is_link(self, path):
+        return isinstance(self._nodes.get(self._key(path)), _Link)
+
+    def scan(self, directory):
+        node = self._resolve(directory)
+        if not isinstance(node, _Dir):
+            raise NotADirectoryError(f"Not a directory: {str(directory)!r}")
+        dirs, names = [], []
+        for name in list(node.children):
+            child = self._resolve(Path(directory) / name)
+            if isinstance(child, _Dir):
+                dirs.append(Path(directory) / name)
+            elif not name.startswith("."):
+                names.append(name)
+        return dirs, names
+
+    def exists(self, path):
+        try:
+            self._resolve(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def is_dir(self, path):
+        return self.exists(path) and isinstance(self._resolve(path), _Dir)
+
+    def stat(self, path):
+        node = self._resolve(path)
+        if isinstance(node, _Dir):
+            return FileStat(0, 0.0, 0)
+        return FileStat(len(node.data), node.mtime_ns / 1e9, node.mtime_ns)
+
+    def open(self, path, mode="r", **kwargs):
+        if "r" in mode:
+            f = io.BytesIO(self.read_file(path))
+        elif "w" in mode:
+            if not self.is_dir(self._parent(self._key(path))):
+                raise FileNotFoundError(f"No such file or directory: {str(path)!r}")
+            f = _Writer(self, path)
+        else:
+            raise ValueError(f"Unsupported mode for MemoryFS.open: {mode!r}")
+        return f if "b" in mode else io.TextIOWrapper(f, encoding="utf-8", newline=kwargs.get("newline"))
+
+    def mkdir(self, path):
+        with self._lock:
+            key = self._key(path)
+            missing = []
+            while key not in self._nodes:
+                missing.append(key)
+                key = self._parent(key)
+            if not isinstance(self._resolve(key), _Dir):
+                raise NotADirectoryError(f"Not a directory: {key!r}")
+            for key in reversed(missing):
+                self._put(key, _Dir())
+
+    def copy(self, src, dst, clone=False, metadata="full"):
+        node = self._file(src)
+        self._put(dst, _File(node.data, time.time_ns() if metadata == "none" else node.mtime_ns))
+
+    def link(self, src, dst, symbolic=False):
+        if symbolic:
+            self._put(dst, _Link(self._key(src)), replace=False)
+        else:
+            self._put(dst, self._file(src), replace=False)
+
+    def move(self, src, dst):
+        with self._lock:
+            node = self._pop(src)
+            try:
+                self._put(dst, node)
+            except OSError:
+                self._put(src, node)
+                raise
@@ -1,5 +1,7 @@
 from collections import defaultdict
 
+from .index import FileIndex
+
 
 def group_by_prefix(files, len_pairs):
     """Groups files by Path.stem, validates each group has len_pairs members."""
@@ -17,13 +19,17 @@ def resolve_grouping(files, group_prefix=None, group=None):
     if group_prefix is not None and group is not None:
         raise ValueError("Cannot use both `group_prefix` and `group`.")
     if group_prefix is not None:
+        if isinstance(files, FileIndex):
+            return files.group_by_prefix(group_prefix)
         return group_by_prefix(files, group_prefix)
     if group is None:
         return files
     if group == "stem":
+        if isinstance(files, FileIndex):
+            return files.group_by_stem()
         return group_by_stem(files)
     if callable(group):
-        return group(files)
+        return group(list(files))
     if group == "sibling":
         return files  # sibling handled at orchestration level, not here
     raise ValueError(f"Unknown group value: {group!r}.")
@@ -48,12 +54,12 @@ def group_by_stem(files):
     return [tuple(sorted(g)) for g in sorted(stem_groups.values(), key=lambda g: g[0])]
 
 
-def setup_sibling_files(input_dir, seed, formats=None, shuffle=True):
+def setup_sibling_files(input_dir, seed, formats=None, shuffle=True, engine="python", fs=None):
     """Lists type dirs, groups files by stem across all dirs.
     Validates every stem exists in every dir. Returns (type_dir_names, groups)."""
     from .utils import list_dirs, list_files
 
-    type_dirs = sorted(list_dirs(input_dir))
+    type_dirs = sorted(list_dirs(input_dir, fs))
     if len(type_dirs) < 2:
         raise ValueError(f"group='sibling' requires at least 2 subdirectories, found {len(type_dirs)}.")
 
@@ -63,7 +69,7 @@ def setup_sibling_files(input_dir, seed, formats=None, shuffle=True):
     stems_per_dir = {}
     files_per_dir = {}
     for td in type_dirs:
-        dir_files = list_files(td, formats)
+        dir_files = list_files(td, formats, fs)
         files_per_dir[td.name] = {f.stem: f for f in dir_files}
         stems_per_dir[td.name] = set(files_per_dir[td.name].keys())
 
@@ -86,7 +92,12 @@ def setup_sibling_files(input_dir, seed, formats=None, shuffle=True):
     random.seed(seed)
     sorted_stems = sorted(all_stems)
     if shuffle:
-        random.shuffle(sorted_stems)
+        if engine == "numpy":
+            from .engine import shuffle_numpy
+
+            shuffle_numpy(sorted_stems, seed)
+        else:
+            random.shuffle(sorted_stems)
 
     groups = []
     for stem in sorted_stems:
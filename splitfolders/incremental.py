@@ -0,0 +1,88 @@
+"""Incremental re-splits: only new or changed files are transferred into an existing output folder."""
+
+import json
+import os
+from itertools import groupby
+from pathlib import Path
+
+from .utils import hash_bucket
+
+STATE_FILE = ".splitfolders-state.json"
+
+
+def load_state(output):
+    """Returns the state of the previous split into `output` or None"""
+    path = Path(output) / STATE_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(output, state):
+    path = Path(output) / STATE_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)  # never leave a half-written state behind
+
+
+def _destination(output, split, label, name):
+    if label is None:
+        return Path(output) / split / name
+    return Path(output) / split / label / name
+
+
+def resplit(plan, state, input, output, seed, ratio, settings):
+    """
+    Compares a freshly planned split with the state of the previous one.
+
+    Files seen before keep their split, new groups are placed by a keyed hash
+    of their relative paths and the seed, so adding files never moves existing
+    ones. Without a previous state the planned (shuffled) split is kept.
+
+    Returns (todo, stale, state): the plan entries to transfer, the
+    destinations whose source vanished and the new state.
+    """
+    if state is not None and state["settings"] != settings:
+        raise ValueError(
+            f'The output folder "{output}" was split with different settings {state["settings"]}.'
+            " Use a new output folder or remove it to split from scratch."
+        )
+
+    known = state["files"] if state is not None else {}
+    splits = ["train", "val", "test"][: len(ratio)]
+    todo, files = [], {}
+
+    for _, unit in groupby(plan, key=lambda e: e.group):
+        unit = list(unit)
+        rels = [Path(e.source).relative_to(input).as_posix() for e in unit]
+
+        previous = [known[rel]["split"] for rel in rels if rel in known]
+        if previous:
+            split = previous[0]
+        elif state is None:
+            split = unit[0].split
+        else:
+            split = splits[hash_bucket("\0".join(rels), seed, ratio)]
+
+        changed = False
+        for i, (e, rel) in enumerate(zip(unit, rels)):
+            destination = _destination(output, split, e.label, Path(e.source).name)
+            st = os.stat(e.source)
+            files[rel] = {
+                "split": split,
+                "destination": destination.relative_to(output).as_posix(),
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+            }
+            old = known.get(rel)
+            if old is None or old != files[rel] or not os.path.lexists(destination):
+                changed = True
+            unit[i] = e._replace(split=split, destination=destination)
+        if changed:
+            todo.extend(unit)
+
+    stale = [Path(output) / f["destination"] for rel, f in known.items() if rel not in files]
+    return todo, stale, {"settings": settings, "files": files}
@@ -0,0 +1,172 @@
+"""
+A compact index of the files in one directory. All file names are stored in a
+single string with integer offsets, groups of files as integer arrays, so
+sorting, shuffling and splitting millions of files only moves integers around.
+A `pathlib.Path` is built when a file is accessed, i.e. at copy time.
+"""
+
+import os
+import random
+from array import array
+from collections import defaultdict
+from io import StringIO
+from pathlib import Path
+
+
+def _suffix(name):
+    """Same as `Path(name).suffix`"""
+    i = name.rfind(".")
+    return name[i:] if 0 < i < len(name) - 1 else ""
+
+
+def _stem(name):
+    """Same as `Path(name).stem`"""
+    i = name.rfind(".")
+    return name[:i] if 0 < i < len(name) - 1 else name
+
+
+def scan(directory, formats=None, fs=None):
+    """
+    Lists a directory in a single pass like `utils.scan_dir`, but returns the
+    files as a FileIndex: (dirs, index)
+    """
+    if fs is not None:
+        dirs, names = fs.scan(directory)
+        return dirs, FileIndex(directory, (n for n in names if not formats or _suffix(n) in formats))
+
+    dirs = []
+
+    def names(it):
+        for entry in it:
+            if entry.is_dir():
+                dirs.append(Path(entry.path))
+            elif entry.is_file() and not entry.name.startswith("."):
+                if not formats or _suffix(entry.name) in formats:
+                    yield entry.name
+
+    with os.scandir(directory) as it:
+        index = FileIndex(directory, names(it))
+    return dirs, index
+
+
+class FileIndex:
+    """
+    Sequence of the files (or groups of files) of `directory`, compatible with
+    the lists of Paths (or tuples of Paths) used by the split functions.
+    Slicing returns a view sharing the name table.
+    """
+
+    def __init__(self, directory, names):
+        self.directory = Path(directory)
+        table = StringIO()
+        self.offsets = array("Q", [0])
+        for name in names:
+            table.write(name)
+            self.offsets.append(self.offsets[-1] + len(name))
+        self.table = table.getvalue()
+        # groups: the files of group g are members[starts[g] : starts[g + 1]]
+        self.members = None
+        self.starts = None
+        self.order = array("Q", range(len(self.offsets) - 1))
+
+    @classmethod
+    def from_directory(cls, directory, formats=None, fs=None):
+        return scan(directory, formats, fs)[1]
+
+    def _view(self, order, members=None, starts=None):
+        view = object.__new__(FileIndex)
+        view.directory = self.directory
+        view.table = self.table
+        view.offsets = self.offsets
+        view.members = self.members if members is None else members
+        view.starts = self.starts if starts is None else starts
+        view.order = order
+        return view
+
+    @classmethod
+    def concat(cls, views):
+        """Joins views of the same index, e.g. the train partitions of a fold"""
+        order = array("Q")
+        for view in views:
+            order.extend(view.order)
+        return views[0]._view(order)
+
+    def name(self, i):
+        return self.table[self.offsets[i] : self.offsets[i + 1]]
+
+    def _get(self, item):
+        if self.members is None:
+            return self.directory / self.name(item)
+        return tuple(
+            self.directory / self.name(self.members[m]) for m in range(self.starts[item], self.starts[item + 1])
+        )
+
+    def _sort_key(self, item):
+        if self.members is None:
+            return os.path.normcase(self.name(item))  # same order as sorting the Paths
+        return tuple(
+            os.path.normcase(self.name(self.members[m])) for m in range(self.starts[item], self.starts[item + 1])
+        )
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        for item in self.order:
+            yield self._get(item)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._view(self.order[i])
+        return self._get(self.order[i])
+
+    def __repr__(self):
+        return f"FileIndex({str(self.directory)!r}, {len(self)} items)"
+
+    def sort(self):
+        self.order = array("Q", sorted(self.order, key=self._sort_key))
+
+    def shuffle(self):
+        # same permutation as random.shuffle on a list of the same length
+        random.shuffle(self.order)
+
+    def _stem_groups(self):
+        stem_groups = defaultdict(list)
+        for i in self.order:
+            stem_groups[_stem(self.name(i))].append(i)
+        return stem_groups
+
+    def _grouped(self, groups):
+        """Returns a view with one item per group, members and groups sorted like `tuple(sorted(g))`"""
+        members = array("Q")
+        starts = array("Q", [0])
+        for g in groups:
+            members.extend(sorted(g, key=lambda i: os.path.normcase(self.name(i))))
+            starts.append(len(members))
+        view = self._view(array("Q", range(len(starts) - 1)), members, starts)
+        view.sort()
+        return view
+
+    def group_by_prefix(self, len_pairs):
+        """Same as `grouping.group_by_prefix`"""
+        stem_groups = self._stem_groups()
+        for stem, group in stem_groups.items():
+            if len(group) != len_pairs:
+                raise ValueError(f"Expected {len_pairs} files with stem '{stem}', found {len(group)}")
+        return self._grouped(stem_groups.values())
+
+    def group_by_stem(self):
+        """Same as `grouping.group_by_stem`"""
+        stem_groups = self._stem_groups()
+
+        sizes = {len(g) for g in stem_groups.values()}
+        if len(sizes) != 1:
+            size_details = {stem: len(g) for stem, g in stem_groups.items()}
+            raise ValueError(f"All stems must have the same number of files. Found sizes: {size_details}")
+
+        if sizes.pop() == 1:
+            view = self[:]
+            view.sort()
+            return view
+
+        return self._grouped(stem_groups.values())
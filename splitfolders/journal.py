@@ -0,0 +1,137 @@
+"""Resumable splits: a journal in the output folder records the planned split and the finished transfers."""
+
+import json
+import os
+import time
+from pathlib import Path
+
+from .plan import PlanEntry
+
+JOURNAL_FILE = ".splitfolders-journal.jsonl"
+
+
+class Journal:
+    """
+    Appends the destinations of finished transfers to the journal, in
+    batches of `batch_size` files or every `interval` seconds. Each batch is
+    flushed to disk before the next one starts.
+    """
+
+    def __init__(self, path, batch_size=1000, interval=1.0):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.interval = interval
+        self._file = open(self.path, "a")
+        self._batch = []
+        self._last = time.monotonic()
+
+    def done(self, destinations):
+        self._batch.extend(str(d) for d in destinations)
+        if len(self._batch) >= self.batch_size or time.monotonic() - self._last >= self.interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        if self._batch:
+            self._file.write(json.dumps({"done": self._batch}) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._batch = []
+        self._last = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.checkpoint()
+            self._file.close()
+
+    def finish(self):
+        """Removes the journal once the split is complete"""
+        self.close()
+        self.path.unlink()
+
+
+def _write_plan(path, settings, entries):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps({"settings": settings}) + "\n")
+        for e in entries:
+            f.write(json.dumps({"plan": [str(e.source), str(e.destination), e.split, e.label, e.group]}) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)  # a journal is either complete or not there
+
+
+def load_journal(output):
+    """Returns (settings, entries, done) of an unfinished split into `output` or None"""
+    path = Path(output) / JOURNAL_FILE
+    if not path.exists():
+        return None
+    settings, entries, done = None, [], set()
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                break  # the last batch was cut off by the crash
+            if "plan" in record:
+                source, destination, split, label, group = record["plan"]
+                entries.append(PlanEntry(Path(source), Path(destination), split, label, group))
+            elif "done" in record:
+                done.update(record["done"])
+            else:
+                settings = record["settings"]
+    return settings, entries, done
+
+
+def _finished(move, source, destination):
+    """
+    Checks a transfer that may have been interrupted. Partial copies are
+    removed so they are transferred again.
+    """
+    if move is True or move == "move":
+        if not os.path.lexists(source):
+            if os.path.lexists(destination):
+                return True
+            raise ValueError(f'"{source}" was moved but is missing at "{destination}".')
+        if os.path.lexists(destination):
+            os.unlink(destination)  # a move across filesystems copies first
+        return False
+
+    if not os.path.lexists(destination):
+        return False
+    if move == "symlink":
+        return True
+    src, dst = os.stat(source), os.stat(destination)
+    if move == "hardlink" and os.path.samestat(src, dst):
+        return True
+    # copies get the modification time of the source as their last step
+    if src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns:
+        return True
+    os.unlink(destination)
+    return False
+
+
+def open_journal(output, settings, move, plan):
+    """
+    Continues the split recorded in the journal of `output`, or starts a new
+    journal with the entries returned by `plan()`. The settings have to match
+    the ones the journal was started with.
+
+    Returns (journal, entries, todo): the open journal, all planned entries
+    and the ones left to transfer.
+    """
+    path = Path(output) / JOURNAL_FILE
+    previous = load_journal(output)
+    if previous is None:
+        entries, done = list(plan()), set()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_plan(path, settings, entries)
+    else:
+        previous_settings, entries, done = previous
+        if previous_settings != settings:
+            raise ValueError(
+                f'The unfinished split in "{output}" was started with different settings {previous_settings}.'
+                f' Rerun it with the same settings or remove "{path}".'
+            )
+
+    todo = [e for e in entries if str(e.destination) not in done and not _finished(move, e.source, e.destination)]
+    return Journal(path), entries, todo
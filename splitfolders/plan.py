@@ -0,0 +1,66 @@
+"""The planned assignment of a split: which file goes where, computed without touching any file."""
+
+import csv
+import json
+from collections import Counter, namedtuple
+from pathlib import Path
+
+PlanEntry = namedtuple("PlanEntry", ["source", "destination", "split", "label", "group"])
+
+
+class Plan:
+    """
+    The full assignment of a split as a list of PlanEntry. Returned by
+    `ratio`, `fixed` and `kfold` with `dry_run=True`.
+
+    `split` is e.g. `train` or `fold_1/val`, `label` the class (or sibling
+    type dir) and None for flat inputs. Files sharing the same `group` number
+    were kept together by the grouping. `dirs` are the output folders the
+    split creates, also those that stay empty.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = list(entries) if entries is not None else []
+        self.dirs = set()
+        self.num_groups = max((e.group for e in self.entries), default=-1) + 1
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __repr__(self):
+        return f"Plan({len(self.entries)} files in {self.num_groups} groups)"
+
+    def add_unit(self, unit):
+        """Adds a unit (list of transfer items) as one group"""
+        for item in unit:
+            src = Path(item.src)
+            destination = Path(item.dst_dir) / (item.name or src.name)
+            self.entries.append(PlanEntry(src, destination, item.split, item.label, self.num_groups))
+        self.num_groups += 1
+
+    def counts(self):
+        """Returns the number of files per (split, label)"""
+        return Counter((e.split, e.label) for e in self.entries)
+
+    def write(self, path):
+        """
+        Writes the plan as a manifest, the format (`.csv` or `.jsonl`) is
+        taken from the file extension
+        """
+        path = Path(path)
+        if path.suffix == ".csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(PlanEntry._fields)
+                for e in self.entries:
+                    writer.writerow([e.source, e.destination, e.split, "" if e.label is None else e.label, e.group])
+        elif path.suffix == ".jsonl":
+            with open(path, "w") as f:
+                for e in self.entries:
+                    record = e._replace(source=str(e.source), destination=str(e.destination))._asdict()
+                    f.write(json.dumps(record) + "\n")
+        else:
+            raise ValueError(f'Unknown manifest format "{path.suffix}". Use ".csv" or ".jsonl".')
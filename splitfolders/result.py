@@ -0,0 +1,68 @@
+"""What a split did: the files per split and class, counted while they are transferred."""
+
+from collections import Counter, defaultdict
+
+
+class SplitResult:
+    """
+    Returned by `ratio`, `fixed` and `kfold` (a `Plan` is returned instead
+    with `dry_run=True`), so the output folder does not have to be walked.
+
+    `files` counts the files per (split, label), `split` being e.g. `train`
+    or `fold_1/val` and `label` the class (or sibling type dir), None for flat
+    inputs. With `details=True` the size of the source files is counted in
+    `bytes` and the destination paths are listed in `destinations`, this
+    costs a stat call per file.
+    """
+
+    def __init__(self, details=False):
+        self.details = details
+        self.files = Counter()
+        self.bytes = Counter() if details else None
+        self.destinations = defaultdict(list) if details else None
+
+    def __len__(self):
+        return sum(self.files.values())
+
+    def __repr__(self):
+        return f"SplitResult({len(self)} files in {len(self.splits())} splits)"
+
+    def add(self, records):
+        """Adds transferred files given as (split, label, size, status, destination)"""
+        for split, label, size, _, destination in records:
+            self.files[split, label] += 1
+            if self.details:
+                self.bytes[split, label] += size
+                self.destinations[split, label].append(destination)
+
+    def _by(self, bytes, key):
+        if bytes and not self.details:
+            raise ValueError("The bytes are only counted with `details=True`.")
+        totals = Counter()
+        for split_label, n in (self.bytes if bytes else self.files).items():
+            if key(split_label) is not None:
+                totals[key(split_label)] += n
+        return totals
+
+    def splits(self, bytes=False):
+        """Returns the number of files (or bytes) per split"""
+        return self._by(bytes, lambda x: x[0])
+
+    def labels(self, bytes=False):
+        """Returns the number of files (or bytes) per label, i.e. class"""
+        return self._by(bytes, lambda x: x[1])
+
+    def folds(self, bytes=False):
+        """Returns the number of files (or bytes) per fold of a `kfold` split, e.g. `fold_1`"""
+        return self._by(bytes, lambda x: x[0].split("/")[0] if x[0].startswith("fold_") else None)
+
+    def to_dict(self):
+        """Returns one record per (split, label) with the files (and bytes and destinations)"""
+        records = []
+        for (split, label), n in sorted(self.files.items(), key=lambda x: (x[0][0], x[0][1] or "")):
+            record = {"split": split, "label": label, "files": n}
+            if self.details:
+                record["bytes"] = self.bytes[split, label]
+                record["destinations"] = [str(p) for p in self.destinations[split, label]]
+            records.append(record)
+        return {"files": len(self), "splits": records}
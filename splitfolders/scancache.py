@@ -0,0 +1,113 @@
+"""Scan cache: the listings of the input folders are kept across splits and reused while a folder is unchanged."""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from .fs import LocalFS
+from .utils import scan_dir
+
+SCAN_CACHE_VERSION = 1
+
+# folders modified this recently are listed but not cached, an entry added within the same
+# tick of their modification time (or on a server with a clock ahead) would go unnoticed
+RACY_NS = 2_000_000_000
+
+
+def user_cache_dir():
+    """The folder for caches of the user, e.g. `~/.cache/splitfolders` on Linux"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "splitfolders"
+
+
+def scan_cache_path(input):
+    """The scan cache of the input folder `input` in the user cache folder"""
+    digest = hashlib.blake2b(os.path.abspath(input).encode(), digest_size=8).hexdigest()
+    return user_cache_dir() / f"scan-{digest}.json"
+
+
+class ScanCache(LocalFS):
+    """
+    The local disk with the listings of its folders cached in the JSON file
+    `path`. A listing is reused while the modification time and inode of its
+    folder are the same, i.e. no entry was added, removed or renamed in it;
+    other folders are scanned again. Changes to the content of files do not
+    matter, only their names are cached.
+
+    Listings are taken from `scan` and written by `save`. `hits` and `misses`
+    count the folders listed from the cache and from the disk.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._entries = self._load()
+        self._visited = set()
+        self._changed = False
+
+    def __repr__(self):
+        return f"ScanCache({str(self.path)!r}, {self.hits} hits, {self.misses} misses)"
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, ValueError):  # no cache yet, or not JSON
+            return {}
+        if not isinstance(cache, dict) or cache.get("version") != SCAN_CACHE_VERSION:
+            return {}
+        return cache["dirs"]
+
+    def scan(self, directory):
+        key = os.path.abspath(directory)
+        st = os.stat(directory)
+        stamp = [st.st_mtime_ns, st.st_ino]
+        self._visited.add(key)
+
+        entry = self._entries.get(key)
+        if entry is not None and entry["stamp"] == stamp:
+            self.hits += 1
+            return [Path(directory) / name for name in entry["dirs"]], list(entry["files"])
+
+        self.misses += 1
+        dirs, files = scan_dir(directory)
+        names = [f.name for f in files]
+        if time.time_ns() - st.st_mtime_ns > RACY_NS:
+            self._entries[key] = {"stamp": stamp, "dirs": [d.name for d in dirs], "files": names}
+            self._changed = True
+        elif self._entries.pop(key, None) is not None:
+            self._changed = True
+        return dirs, names
+
+    def save(self, root=None):
+        """
+        Writes the cache if a listing changed. Listings of folders inside
+        `root` that were not scanned since the cache was loaded (e.g. removed
+        class folders) are dropped.
+        """
+        if root is not None:
+            root = os.path.abspath(root)
+            for key in list(self._entries):
+                inside = key == root or key.startswith(os.path.join(root, ""))
+                if inside and key not in self._visited:
+                    del self._entries[key]
+                    self._changed = True
+        if not self._changed:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # several splits (e.g. shards) may share the cache, each writes its own file and replaces the cache
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"version": SCAN_CACHE_VERSION, "dirs": self._entries}, f)
+        os.replace(tmp_path, self.path)
+        self._changed = False
@@ -0,0 +1,61 @@
+"""Sharding of a split job: several independent runs each transfer a disjoint part of the same split."""
+
+import heapq
+from collections import defaultdict
+
+SHARD_BY = ("count", "bytes")
+
+
+def valid_shards(num_shards, shard_index, shard_by):
+    if not isinstance(num_shards, int) or num_shards < 1:
+        raise ValueError(f"`num_shards` must be a positive integer, got {num_shards!r}.")
+    if not isinstance(shard_index, int) or not 0 <= shard_index < num_shards:
+        raise ValueError(f"`shard_index` must be an integer from 0 to {num_shards - 1}, got {shard_index!r}.")
+    if shard_by not in SHARD_BY:
+        raise ValueError(f"Invalid value for shard_by: {shard_by!r}. Use 'count' or 'bytes'.")
+
+
+def shard_plan(entries, shard_index, num_shards, shard_by="count", fs=None):
+    """
+    Returns the planned entries (see Plan) transferred by shard `shard_index`
+    of `num_shards` as (entries, derived). Groups are never split and are
+    balanced by their number of files or, with `shard_by="bytes"`, by the
+    size of their sources (a stat per file on every shard).
+
+    The groups are ordered by their destinations, not by the order of the
+    plan, so every shard computes the same assignment for the same split.
+    Entries copying the output of another one (oversampled duplicates) go
+    to its shard and are returned as `derived`, to be transferred after the
+    others.
+    """
+    owner = {e.destination: e.group for e in entries}
+    groups = defaultdict(list)
+    derived = set()
+    for e in entries:
+        root = owner.get(e.source)
+        if root is None:
+            groups[e.group].append(e)
+        else:
+            groups[root].append(e)
+            derived.add(id(e))
+
+    weights = {}
+    for group, members in groups.items():
+        if shard_by == "bytes":
+            sizes = {e.destination: fs.stat(e.source).st_size for e in members if id(e) not in derived}
+            weights[group] = sum(sizes.get(e.source, 0) for e in members if id(e) in derived) + sum(sizes.values())
+        else:
+            weights[group] = len(members)
+
+    # largest groups first, each to the least loaded shard (the lowest index on ties)
+    order = sorted(groups, key=lambda g: (-weights[g], min(str(e.destination) for e in groups[g])))
+    loads = [(0, i) for i in range(num_shards)]
+    mine = set()
+    for group in order:
+        load, i = heapq.heappop(loads)
+        if i == shard_index:
+            mine.add(group)
+        heapq.heappush(loads, (load + weights[group], i))
+
+    selected = [e for g in sorted(mine) for e in groups[g]]
+    return [e for e in selected if id(e) not in derived], [e for e in selected if id(e) in derived]
@@ -0,0 +1,242 @@
+"""Archive output sinks: the files of a split are written into tar or zip shards instead of folders."""
+
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from collections import Counter
+from itertools import groupby
+from pathlib import Path
+
+SINK_FORMATS = ("tar", "zip")
+
+# size of the reads from the input and of the writes into an archive
+BUFFER_SIZE = 1 << 20
+
+
+class _TarShard:
+    def __init__(self, path):
+        self._file = open(path, "wb", buffering=BUFFER_SIZE)
+        self._tar = tarfile.open(fileobj=self._file, mode="w", format=tarfile.PAX_FORMAT, dereference=True)
+        self._tar.copybufsize = BUFFER_SIZE
+
+    def add(self, src, member):
+        info = self._tar.gettarinfo(src, member)
+        with open(src, "rb", buffering=0) as f:
+            self._tar.addfile(info, f)
+
+    def add_fileobj(self, f, member, size, mtime):
+        info = tarfile.TarInfo(member)
+        info.size, info.mtime = size, mtime
+        self._tar.addfile(info, f)
+
+    def close(self):
+        self._tar.close()
+        self._file.close()
+
+
+class _ZipShard:
+    def __init__(self, path):
+        # stored, not compressed: training data (images, audio) is compressed already
+        self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+
+    def add(self, src, member):
+        with open(src, "rb", buffering=0) as f:
+            self._write(f, zipfile.ZipInfo.from_file(src, member))
+
+    def add_fileobj(self, f, member, size, mtime):
+        info = zipfile.ZipInfo(member, _zip_date(mtime))
+        info.file_size = size
+        self._write(f, info)
+
+    def _write(self, f, info):
+        with self._zip.open(info, "w") as f_dst:
+            shutil.copyfileobj(f, f_dst, BUFFER_SIZE)
+
+    def close(self):
+        self._zip.close()
+
+
+def _zip_date(mtime):
+    # zip archives cannot hold dates before 1980
+    return max(time.localtime(mtime)[:6], (1980, 1, 1, 0, 0, 0))
+
+
+class _Shard:
+    def __init__(self, path, writer):
+        self.path = path
+        self.writer = writer
+        self.size = 0  # including the files still to come of its groups
+        self.pending = set()  # groups with files still to come
+        self.full = False
+
+
+class _Shards:
+    """
+    The shards of an ArchiveSink being written, one open shard per split (and
+    class) takes new groups. The whole size of a group is reserved when its
+    first file arrives; a full shard stays open until its groups are complete,
+    so the files of a group always end up together even if they do not
+    arrive one after the other.
+    """
+
+    def __init__(self, sink, output, entries, sizes):
+        self.sink = sink
+        self.output = output
+        self._current = {}  # key -> shard taking new groups
+        self._pending = {}  # (key, group) -> shard
+        self._count = Counter()
+        self._group_sizes = Counter()
+        self._left = Counter()
+        for e, size in zip(entries, sizes):
+            self._group_sizes[sink._key(e), e.group] += size
+            self._left[sink._key(e), e.group] += 1
+
+    def add(self, entry, write):
+        """Calls `write(writer, member)` for the shard of `entry`, returns the destination"""
+        key = self.sink._key(entry)
+        group = key, entry.group
+        shard = self._pending.get(group)
+        if shard is None:
+            shard = self._current.get(key)
+            size = self._group_sizes[group]
+            max_size = self.sink.max_size
+            if shard is not None and max_size is not None and shard.size > 0 and shard.size + size > max_size:
+                self._retire(key)
+                shard = None
+            if shard is None:
+                shard = self._start(key)
+            shard.size += size
+            shard.pending.add(group)
+            self._pending[group] = shard
+
+        member = self.sink._member(entry)
+        write(shard.writer, member)
+        self._left[group] -= 1
+        if self._left[group] == 0:
+            del self._pending[group]
+            shard.pending.discard(group)
+            if shard.full and not shard.pending:
+                self._finish(shard)
+        return shard.path / member
+
+    def _start(self, key):
+        path = self.sink._shard_path(self.output, key, self._count[key])
+        self._count[key] += 1
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        shard = _Shard(path, _TarShard(tmp_path) if self.sink.format == "tar" else _ZipShard(tmp_path))
+        self._current[key] = shard
+        return shard
+
+    def _retire(self, key):
+        shard = self._current.pop(key)
+        shard.full = True
+        if not shard.pending:
+            self._finish(shard)
+
+    def _finish(self, shard):
+        shard.writer.close()
+        os.replace(shard.path.with_name(shard.path.name + ".tmp"), shard.path)
+
+    def finish(self, key):
+        """Completes the open shard of `key`, if any"""
+        if key in self._current:
+            self._retire(key)
+
+    def close(self, failed=False):
+        shards = {id(s): s for s in list(self._current.values()) + list(self._pending.values())}
+        self._current.clear()
+        self._pending.clear()
+        for shard in shards.values():
+            if failed:
+                shard.writer.close()  # an incomplete shard keeps its .tmp name
+            else:
+                self._finish(shard)
+
+
+class ArchiveSink:
+    """
+    Writes the files of a split into archives (`"tar"` or `"zip"`) in the
+    output folder instead of folders, e.g. WebDataset-style tar shards.
+
+    Each split gets its own shards, `train-000000.tar`, `train-000001.tar`,
+    ... (`fold_1/train-000000.tar` for `kfold`) with the files stored as
+    `label/name`. With `per_class=True` each class gets its own shards as
+    well, `train/cats-000000.tar`, with the files stored as `name`.
+
+    A new shard is started when the next group of files would push the
+    current one over `max_size` bytes (unbounded by default). Groups of files
+    are never spread over several shards. Shards are written sequentially
+    with large buffers and renamed from `.tmp` once complete.
+    """
+
+    def __init__(self, format="tar", max_size=None, per_class=False):
+        if format not in SINK_FORMATS:
+            raise ValueError(f"Invalid archive format: {format!r}. Use 'tar' or 'zip'.")
+        if max_size is not None and max_size <= 0:
+            raise ValueError(f"`max_size` must be a positive number of bytes, got {max_size!r}.")
+        self.format = format
+        self.max_size = max_size
+        self.per_class = per_class
+
+    def __repr__(self):
+        return f"ArchiveSink({self.format!r}, max_size={self.max_size!r}, per_class={self.per_class!r})"
+
+    def _key(self, entry):
+        return entry.split, entry.label if self.per_class else None
+
+    def _member(self, entry):
+        name = Path(entry.destination).name
+        return name if self.per_class or entry.label is None else f"{entry.label}/{name}"
+
+    def _shard_path(self, output, key, i):
+        split, label = key
+        prefix = Path(output) / split if label is None else Path(output) / split / label
+        return prefix.with_name(f"{prefix.name}-{i:06d}.{self.format}")
+
+    def shards(self, output, entries, sizes):
+        """Returns the shards to write planned `entries` with the given file sizes into"""
+        return _Shards(self, output, entries, sizes)
+
+    def run_plan(self, entries, output, transfer, prog_bar):
+        """
+        Writes planned entries (see Plan) into the shards, entries of the same
+        group are written together. The files are counted in the result and
+        stats of `transfer`.
+        """
+        # files planned from the output (e.g. oversampled duplicates) are read from their source
+        sources = {Path(e.destination): Path(e.source) for e in entries}
+        # one shard is open at a time, the order within a split is kept
+        entries = sorted(entries, key=lambda e: (e.split, e.label or "") if self.per_class else e.split)
+        srcs = [sources.get(Path(e.source), Path(e.source)) for e in entries]
+        sizes = [os.stat(src).st_size for src in srcs]
+        shards = self.shards(output, entries, sizes)
+        try:
+            position = 0
+            for key, split_entries in groupby(entries, key=self._key):
+                for _, unit in groupby(split_entries, key=lambda e: e.group):
+                    records = []
+                    for e in unit:
+                        src, size = srcs[position], sizes[position]
+                        position += 1
+                        destination = shards.add(e, lambda writer, member: writer.add(src, member))
+                        records.append((e.split, e.label, size, None, destination))
+                    transfer._record(records)
+                    if prog_bar is not None:
+                        prog_bar.update()
+                shards.finish(key)
+        except BaseException:
+            shards.close(failed=True)
+            raise
+        shards.close()
+
+
+def get_sink(sink):
+    """Returns an ArchiveSink for `sink`, a format name or an ArchiveSink"""
+    if isinstance(sink, ArchiveSink):
+        return sink
+    if sink in SINK_FORMATS:
+        return ArchiveSink(sink)
+    raise ValueError(f"Invalid value for sink: {sink!r}. Use 'tar', 'zip' or an ArchiveSink.")
@@ -32,13 +32,27 @@ into this resulting format:
             ...
 """
 
+import csv
 import os
 import random
-import shutil
+import time
+from functools import partial
 from pathlib import Path
 
+from .archive import ArchiveInput, is_archive
+from .engine import shuffle_numpy, valid_engine
+from .filelist import FileListInput, is_file_list
+from .folds import FOLD_STORES, fold_views, partition_name, write_fold_lists
 from .grouping import resolve_grouping, setup_sibling_files
-from .utils import list_dirs, list_files
+from .incremental import load_state, resplit, save_state
+from .index import FileIndex, scan
+from .journal import open_journal
+from .scancache import ScanCache, scan_cache_path
+from .sharding import shard_plan, valid_shards
+from .sinks import get_sink
+from .stats import Stats, _phase
+from .transfer import Item, Transfer
+from .utils import hash_bucket, iter_files, list_dirs, list_files  # noqa: F401
 
 try:
     from tqdm import tqdm
@@ -48,55 +62,51 @@ except ImportError:
     use_tqdm = False
 
 
-def check_input_format(input, allow_flat=False):
+SPLIT_NAMES = ("train", "val", "test")
+
+OVERSAMPLE_MODES = ("hardlink", "symlink", "manifest")
+
+OVERSAMPLE_MANIFEST = "oversample.csv"
+
+ASSIGNMENTS = ("random", "hash")
+
+
+def check_input_format(input, allow_flat=False, formats=None, with_files=True, fs=None):
+    """
+    Validates the input folder and returns its listing as (dirs, files), so
+    the top level of the input is only scanned once per split. Files are
+    returned as a FileIndex, with `with_files=False` only the directories are
+    listed and files is None. The input is listed from `fs` (a filesystem
+    or an archive.ArchiveInput) if given.
+    """
     p_input = Path(input)
-    if not p_input.exists():
+    if not (p_input.exists() if fs is None else fs.exists(p_input)):
         err_msg = f'The provided input folder "{input}" does not exists.'
-        if not p_input.is_absolute():
+        if fs is None and not p_input.is_absolute():
             err_msg += f' Your relative path cannot be found from the current working directory "{Path.cwd()}".'
         raise ValueError(err_msg)
 
-    if not p_input.is_dir():
+    if not (p_input.is_dir() if fs is None else fs.is_dir(p_input)):
         raise ValueError(f'The provided input folder "{input}" is not a directory')
 
-    dirs = list_dirs(input)
+    if with_files:
+        dirs, files = scan(input, formats, fs)
+    else:
+        dirs, files = list_dirs(input, fs), None
     if len(dirs) == 0 and not allow_flat:
         raise ValueError(
             f'The input data is not in a right format. Within your folder "{input}"'
             " there are no directories. Consult the documentation how to the folder"
             " structure should look like."
         )
+    return dirs, files
 
 
-def _is_flat(input):
+def _is_flat(input, dirs=None):
     """Returns True if the input directory has no subdirectories (flat file layout)."""
-    return len(list_dirs(input)) == 0
-
-
-def _get_copy_fn(move):
-    """Return a function(src, dst_dir) that copies/moves/symlinks a file into dst_dir."""
-    if move is True or move == "move":
-        base_fn = shutil.move
-    elif move is False or move == "copy":
-        base_fn = shutil.copy2
-    elif move == "symlink":
-        base_fn = None  # handled below
-    else:
-        raise ValueError(f"Invalid value for move: {move!r}. Use True, False, or 'symlink'.")
-
-    def copy_fn(src, dst_dir):
-        src = Path(src)
-        dst_dir = Path(dst_dir)
-        if move == "symlink":
-            dst = dst_dir / src.name
-            try:
-                os.symlink(src.resolve(), dst)
-            except FileExistsError:
-                pass
-        else:
-            base_fn(str(src), str(dst_dir))
-
-    return copy_fn
+    if dirs is None:
+        dirs = list_dirs(input)
+    return len(dirs) == 0
 
 
 def valid_extensions(formats):
@@ -110,6 +120,14 @@ def valid_extensions(formats):
         raise ValueError(f"Extensions must start with '.': {invalid_ext}")
 
 
+def valid_assignment(assignment):
+    """
+    Check if the assignment strategy is known
+    """
+    if assignment not in ASSIGNMENTS:
+        raise ValueError(f"Invalid value for assignment: {assignment!r}. Use 'random' or 'hash'.")
+
+
 def ratio(
     input,
     output="output",
@@ -120,60 +138,417 @@ def ratio(
     move=False,
     formats=None,
     shuffle=True,
+    workers=1,
+    executor="thread",
+    dry_run=False,
+    incremental=False,
+    assignment="random",
+    stream=False,
+    metrics=None,
+    details=False,
+    engine="python",
+    resume=False,
+    overwrite="always",
+    sink=None,
+    fs=None,
+    preserve_metadata="full",
+    num_shards=1,
+    shard_index=0,
+    shard_by="count",
+    scan_cache=None,
 ):
     if not round(sum(ratio), 5) == 1:  # round for floating imprecision
         raise ValueError("The sums of `ratio` is over 1.")
     if len(ratio) not in (2, 3):
         raise ValueError("`ratio` should")
+    valid_assignment(assignment)
+    valid_engine(engine)
+    if stream:
+        if assignment != "hash":
+            raise ValueError("`stream=True` requires `assignment='hash'`.")
+        if group_prefix is not None or group is not None:
+            raise ValueError("Cannot use `stream=True` with `group_prefix` or `group`, grouping needs all files.")
+        if incremental:
+            raise ValueError("Cannot use `stream=True` with `incremental=True`.")
+    if resume:
+        _valid_resume(dry_run, stream=stream, incremental=incremental)
+    if sink is not None:
+        sink = _valid_sink(sink, move, dry_run, stream=stream, incremental=incremental, resume=resume)
+    if fs is not None:
+        _reject_options("`fs`", incremental=incremental, resume=resume, sink=sink, scan_cache=scan_cache)
+    valid_shards(num_shards, shard_index, shard_by)
+    if num_shards > 1:
+        _reject_options(
+            "`num_shards`",
+            stream=stream,
+            incremental=incremental,
+            resume=resume,
+            sink=sink,
+            move=move is True or move == "move",
+        )
 
-    check_input_format(input, allow_flat=(group != "sibling"))
+    stats, start = Stats() if metrics is not None else None, time.perf_counter()
+    with _phase(stats, "scan"):
+        file_list, group = _file_list_input(
+            input, fs, group_prefix, group, stream=stream, incremental=incremental, resume=resume, scan_cache=scan_cache
+        )
+        if file_list is not None:
+            input = file_list.root
+        archive = (
+            _archive_input(
+                input,
+                move,
+                stream=stream,
+                incremental=incremental,
+                resume=resume,
+                scan_cache=scan_cache,
+                workers=workers > 1,
+                overwrite_hash=overwrite == "if-changed-hash",
+            )
+            if fs is None and file_list is None
+            else None
+        )
+        cache = _scan_cache(scan_cache, input, stream=stream) if scan_cache else None
+        source = archive or file_list or cache
+        dirs, files = check_input_format(
+            input, allow_flat=(group != "sibling"), formats=formats, with_files=not stream, fs=source or fs
+        )
     valid_extensions(formats)
+    transfer = Transfer(move, workers, executor, dry_run, stats, details, overwrite, fs, source, preserve_metadata)
+
+    split = partial(
+        _split_ratio,
+        input,
+        output,
+        ratio,
+        seed,
+        None,
+        group_prefix,
+        group,
+        move,
+        formats,
+        shuffle,
+        dirs=dirs,
+        files=files,
+        assignment=assignment,
+        engine=engine,
+    )
+    if incremental:
+        if move is True or move == "move":
+            raise ValueError("Cannot use `incremental=True` with `move=True`, the input is gone after the first split.")
+        # plan the split as usual, then only keep what differs from the previous split
+        plan = _plan(transfer, split)
+        settings = {
+            "seed": seed,
+            "ratio": list(ratio),
+            "group_prefix": group_prefix,
+            "group": group if group is None or isinstance(group, str) else "callable",
+            "formats": sorted(formats) if formats else None,
+            "assignment": assignment,
+            "engine": engine,
+        }
+        todo, stale, state = resplit(plan, load_state(output), input, output, seed, ratio, settings)
+        if stats is not None:
+            stats.skipped["unchanged"] += len(plan) - len(todo)
+        planned = plan, todo, []
+    else:
+        journaled = None
+        if resume:
+            journaled = _resume_settings(
+                "ratio",
+                input,
+                seed,
+                group_prefix,
+                group,
+                formats,
+                move,
+                shuffle,
+                engine,
+                ratio=list(ratio),
+                assignment=assignment,
+            )
+        planned = _plan_split(
+            transfer, split, output, journaled, sink, archive, file_list, (num_shards, shard_index, shard_by)
+        )
 
     if use_tqdm:
         prog_bar = tqdm(desc="Copying files", unit=" files")
 
+    with transfer:
+        if planned is None:
+            _split_ratio(
+                input,
+                output,
+                ratio,
+                seed,
+                prog_bar if use_tqdm else None,
+                group_prefix,
+                group,
+                move,
+                formats,
+                shuffle,
+                transfer,
+                dirs,
+                files,
+                assignment,
+                stream,
+                engine,
+            )
+        else:
+            _, todo, derived = planned
+            if incremental and not dry_run:
+                for dst in stale + [e.destination for e in todo]:
+                    if os.path.lexists(dst):
+                        os.unlink(dst)
+            _transfer_planned(transfer, todo, derived, output, sink, archive, prog_bar=prog_bar if use_tqdm else None)
+
+    if use_tqdm:
+        prog_bar.close()
+
+    if incremental and not dry_run:
+        save_state(output, state)
+    if resume:
+        transfer.journal.finish()
+
+    if cache is not None:
+        with _phase(stats, "scan"):
+            cache.save(input)
+
+    _report(metrics, stats, start)
+
+    if dry_run:
+        return transfer.plan
+    return transfer.result
+
+
+def _report(metrics, stats, start):
+    if metrics is not None:
+        stats.seconds = time.perf_counter() - start
+        metrics(stats)
+
+
+def _reject_options(what, **options):
+    """Raises a ValueError if any of `options` is set, they cannot be used with `what`"""
+    for name, value in options.items():
+        if value:
+            raise ValueError(f"Cannot use {what} with `{name}`.")
+
+
+def _valid_resume(dry_run, **options):
+    if dry_run:
+        raise ValueError("Cannot use `resume=True` with `dry_run=True`.")
+    _reject_options("`resume=True`", **options)
+
+
+def _resume_settings(split, input, seed, group_prefix, group, formats, move, shuffle, engine, **options):
+    return {
+        "split": split,
+        "input": str(input),
+        "seed": seed,
+        "group_prefix": group_prefix,
+        "group": group if group is None or isinstance(group, str) else "callable",
+        "formats": sorted(formats) if formats else None,
+        "move": move,
+        "shuffle": shuffle,
+        "engine": engine,
+        **options,
+    }
+
+
+def _valid_sink(sink, move, dry_run, **options):
+    sink = get_sink(sink)
+    if move is not False:
+        raise ValueError("Archive sinks copy the files into the archives, use `move=False`.")
+    _reject_options("`sink`", dry_run=dry_run, **options)
+    return sink
+
+
+def _file_list_input(input, fs, group_prefix, group, **options):
+    """
+    Returns (FileListInput, group) if `input` is a file list, with the groups
+    of the list as `group`, or (None, group)
+    """
+    if not is_file_list(input, fs):
+        return None, group
+    _reject_options("a file list as input", **options)
+    if isinstance(input, FileListInput):
+        file_list = input
+    elif isinstance(input, (str, os.PathLike)):
+        file_list = FileListInput.read(input, fs)
+    else:
+        file_list = FileListInput(input, fs=fs)
+    if file_list.groups:
+        if group_prefix is not None or group is not None:
+            raise ValueError("The file list has groups, cannot use `group_prefix` or `group`.")
+        group = file_list.group
+    return file_list, group
+
+
+def _scan_cache(scan_cache, input, **options):
+    """Returns the ScanCache for `scan_cache`: True (in the user cache folder), a path or a ScanCache"""
+    _reject_options("`scan_cache`", **options)
+    if isinstance(scan_cache, ScanCache):
+        return scan_cache
+    return ScanCache(scan_cache_path(input) if scan_cache is True else scan_cache)
+
+
+def _archive_input(input, move, **options):
+    """Returns an ArchiveInput if `input` is a tar or zip file"""
+    if not is_archive(input):
+        return None
+    if move is not False:
+        raise ValueError("The files of an archive input are extracted, use `move=False`.")
+    _reject_options("an archive as input", **options)
+    return ArchiveInput(input)
+
+
+def _plan(transfer, split):
+    """Plans a split by calling `split` with a dry-run Transfer in place of `transfer`"""
+    planner = Transfer(transfer.move, dry_run=True, stats=transfer.stats, fs=transfer.fs, source=transfer.source)
+    split(transfer=planner)
+    return planner.plan
+
+
+def _plan_split(
+    transfer, split, output, journaled=None, sink=None, archive=None, file_list=None, shards=None, always=False
+):
+    """
+    Plans the split if the options need a plan to run: continues it from the
+    journal with the `journaled` settings (see _resume), or calls `split` with
+    a dry-run Transfer for sinks, archives, shards (num_shards, shard_index,
+    shard_by), file lists or if `always`. Returns None if the split runs
+    directly, else (entries, todo, derived): the whole plan, the entries this
+    run transfers and the oversampled duplicates among them (see
+    _split_derived), with the listed paths of a file list as sources.
+    """
+    num_shards, shard_index, shard_by = shards or (1, 0, "count")
+    extract = archive is not None and not transfer.dry_run
+    if journaled is not None:
+        entries, todo = _resume(output, journaled, transfer, split)
+    elif always or sink is not None or extract or num_shards > 1 or file_list is not None:
+        entries = todo = _plan(transfer, split)
+    else:
+        return None
+
+    derived = []
+    if num_shards > 1 or file_list is not None:
+        if sink is None:
+            # the output folders of the whole plan, so the layout does not depend on which shards ran
+            transfer.mkdirs(entries.dirs | {Path(e.destination).parent for e in entries})
+        if num_shards > 1:
+            with _phase(transfer.stats, "shard"):
+                todo, derived = shard_plan(entries, shard_index, num_shards, shard_by, transfer.source or transfer.fs)
+        else:
+            todo, derived = _split_derived(entries)
+    if file_list is not None:
+        todo = file_list.resolve(todo)
+    return entries, todo, derived
+
+
+def _transfer_planned(transfer, todo, derived, output, sink=None, archive=None, oversample=True, prog_bar=None):
+    """
+    Transfers planned entries: extracted from an archive, into the shards of
+    a sink or file by file, then the `derived` oversampled duplicates
+    """
+    if archive is not None and not transfer.dry_run:
+        with _phase(transfer.stats, "copy"):
+            archive.extract([*todo, *derived], transfer, sink, output, prog_bar)
+    elif sink is not None:
+        with _phase(transfer.stats, "copy"):
+            sink.run_plan([*todo, *derived], output, transfer, prog_bar)
+    else:
+        transfer.run_plan(todo, prog_bar)
+        if derived:
+            # the duplicates of the transferred train files, once these are in place
+            with _oversample_transfer(transfer, oversample) as links:
+                links.run_plan(derived, None)
+
+
+def _resume(output, settings, transfer, split):
+    """
+    Continues an unfinished split into `output` from its journal, or plans
+    the split by calling `split` with a dry-run Transfer and starts a journal.
+    Attaches the journal to `transfer` and returns (entries, todo): the whole
+    plan and the entries left to transfer.
+    """
+    transfer.journal, entries, todo = open_journal(output, settings, transfer.move, partial(_plan, transfer, split))
+    if transfer.stats is not None:
+        transfer.stats.skipped["resumed"] += len(entries) - len(todo)
+    return entries, todo
+
+
+def _split_ratio(
+    input,
+    output,
+    ratio,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle,
+    transfer,
+    dirs,
+    files,
+    assignment,
+    stream=False,
+    engine="python",
+):
+    """Splits the input by ratio, dispatching on its layout (sibling, flat or classes)."""
     if group == "sibling":
         split_sibling_dirs_ratio(
             input,
             output,
             ratio,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             move,
             formats,
             shuffle,
+            transfer,
+            assignment=assignment,
+            engine=engine,
         )
-    elif _is_flat(input):
+    elif _is_flat(input, dirs):
+        transfer.mkdirs(_output_dirs(output, SPLIT_NAMES[: len(ratio)]))
         split_flat_dir_ratio(
             input,
             output,
             ratio,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             group_prefix,
             group,
             move,
             formats,
             shuffle,
+            transfer,
+            files,
+            assignment,
+            stream,
+            engine,
         )
     else:
-        for class_dir in list_dirs(input):
+        transfer.mkdirs(_output_dirs(output, SPLIT_NAMES[: len(ratio)], dirs))
+        for class_dir in dirs:
             split_class_dir_ratio(
                 class_dir,
                 output,
                 ratio,
                 seed,
-                prog_bar if use_tqdm else None,
+                prog_bar,
                 group_prefix,
                 group,
                 move,
                 formats,
                 shuffle,
+                transfer,
+                assignment=assignment,
+                stream=stream,
+                engine=engine,
             )
 
-    if use_tqdm:
-        prog_bar.close()
-
 
 def fixed(
     input,
@@ -186,30 +561,97 @@ def fixed(
     move=False,
     formats=None,
     shuffle=True,
+    workers=1,
+    executor="thread",
+    dry_run=False,
+    metrics=None,
+    details=False,
+    engine="python",
+    resume=False,
+    overwrite="always",
+    sink=None,
+    fs=None,
+    preserve_metadata="full",
+    num_shards=1,
+    shard_index=0,
+    shard_by="count",
+    scan_cache=None,
 ):
-    check_input_format(input, allow_flat=(group != "sibling"))
+    valid_engine(engine)
+    if resume:
+        _valid_resume(dry_run, oversample=oversample)
+    if sink is not None:
+        sink = _valid_sink(sink, move, dry_run, resume=resume)
+    if fs is not None:
+        _reject_options("`fs`", resume=resume, sink=sink, scan_cache=scan_cache)
+    valid_shards(num_shards, shard_index, shard_by)
+    if num_shards > 1:
+        _reject_options(
+            "`num_shards`",
+            resume=resume,
+            sink=sink,
+            oversample_manifest=oversample == "manifest",
+            move=move is True or move == "move",
+        )
+    stats, start = Stats() if metrics is not None else None, time.perf_counter()
+    with _phase(stats, "scan"):
+        file_list, group = _file_list_input(
+            input,
+            fs,
+            group_prefix,
+            group,
+            resume=resume,
+            oversample_manifest=oversample == "manifest",
+            scan_cache=scan_cache,
+        )
+        if file_list is not None:
+            input = file_list.root
+        archive = (
+            _archive_input(
+                input,
+                move,
+                resume=resume,
+                scan_cache=scan_cache,
+                workers=workers > 1,
+                overwrite_hash=overwrite == "if-changed-hash",
+            )
+            if fs is None and file_list is None
+            else None
+        )
+        cache = _scan_cache(scan_cache, input) if scan_cache else None
+        source = archive or file_list or cache
+        dirs, files = check_input_format(input, allow_flat=(group != "sibling"), formats=formats, fs=source or fs)
     valid_extensions(formats)
 
     if group == "sibling" and oversample:
         raise ValueError("Cannot use `oversample=True` with `group='sibling'` (no classes to balance).")
 
-    flat = _is_flat(input) and group != "sibling"
+    flat = _is_flat(input, dirs) and group != "sibling"
 
     if flat and oversample:
         raise ValueError("Cannot use `oversample=True` with a flat input directory (no classes to balance).")
 
+    if not (oversample is True or oversample is False or oversample in OVERSAMPLE_MODES):
+        raise ValueError(
+            f"Invalid value for oversample: {oversample!r}. Use True, False, 'hardlink', 'symlink' or 'manifest'."
+        )
+    if (sink is not None or archive is not None) and oversample not in (True, False):
+        raise ValueError("Oversampled duplicates are stored as copies with an archive, use `oversample=True`.")
+
+    listings = {}
     if fixed == "auto":
         if not oversample:
             raise ValueError(
                 '`fixed="auto"` requires `oversample=True`. For non-oversampled splits, use `ratio` instead.'
             )
-        # Count files per class and derive fixed from the smallest class
-        classes_dirs = list_dirs(input)
+        # Count files per class and derive fixed from the smallest class,
+        # the listings are kept for the split below
         counts = []
-        for class_dir in classes_dirs:
-            files = list_files(class_dir, formats)
-            files = resolve_grouping(files, group_prefix, group)
-            counts.append(len(files))
+        for class_dir in dirs:
+            with _phase(stats, "scan"):
+                listings[class_dir] = FileIndex.from_directory(class_dir, formats, source or fs)
+            with _phase(stats, "group"):
+                counts.append(len(resolve_grouping(listings[class_dir][:], group_prefix, group)))
         min_count = min(counts)
         fixed = [max(1, min_count // 5)]
     else:
@@ -222,95 +664,242 @@ def fixed(
         if len(fixed) == 3 and oversample:
             raise ValueError("Using fixed with 3 values together with oversampling is not implemented.")
 
+    transfer = Transfer(move, workers, executor, dry_run, stats, details, overwrite, fs, source, preserve_metadata)
+
+    split = partial(
+        _split_fixed_input,
+        input,
+        output,
+        fixed,
+        seed,
+        None,
+        group_prefix,
+        group,
+        move,
+        formats,
+        shuffle,
+        dirs=dirs,
+        files=files,
+        flat=flat,
+        listings=listings,
+        oversample=oversample,
+        engine=engine,
+    )
+    journaled = None
+    if resume:
+        journaled = _resume_settings(
+            "fixed", input, seed, group_prefix, group, formats, move, shuffle, engine, fixed=list(fixed)
+        )
+    planned = _plan_split(
+        transfer, split, output, journaled, sink, archive, file_list, (num_shards, shard_index, shard_by)
+    )
+
     if use_tqdm:
         prog_bar = tqdm(desc="Copying files", unit=" files")
 
+    with transfer:
+        if planned is None:
+            _split_fixed_input(
+                input,
+                output,
+                fixed,
+                seed,
+                prog_bar if use_tqdm else None,
+                group_prefix,
+                group,
+                move,
+                formats,
+                shuffle,
+                transfer,
+                dirs,
+                files,
+                flat,
+                listings,
+                oversample,
+                engine,
+            )
+        else:
+            _, todo, derived = planned
+            _transfer_planned(
+                transfer, todo, derived, output, sink, archive, oversample, prog_bar if use_tqdm else None
+            )
+
+    if use_tqdm:
+        prog_bar.close()
+
+    if resume:
+        transfer.journal.finish()
+
+    if cache is not None:
+        with _phase(stats, "scan"):
+            cache.save(input)
+
+    _report(metrics, stats, start)
+
+    if dry_run:
+        return transfer.plan
+    return transfer.result
+
+
+def _split_fixed_input(
+    input,
+    output,
+    fixed,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle,
+    transfer,
+    dirs,
+    files,
+    flat,
+    listings,
+    oversample,
+    engine="python",
+):
+    """Splits the input by fixed numbers, dispatching on its layout (sibling, flat or classes)."""
     if group == "sibling":
         split_sibling_dirs_fixed(
             input,
             output,
             fixed,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             move,
             formats,
             shuffle,
+            transfer,
+            engine,
         )
-        if use_tqdm:
-            prog_bar.close()
-        return
-
-    if flat:
+    elif flat:
+        transfer.mkdirs(_output_dirs(output, _fixed_splits(fixed)))
         split_flat_dir_fixed(
             input,
             output,
             fixed,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             group_prefix,
             group,
             move,
             formats,
             shuffle,
+            transfer,
+            files,
+            engine,
         )
-        if use_tqdm:
-            prog_bar.close()
-        return
-
-    classes_dirs = list_dirs(input)
-    num_items = []
-    for class_dir in classes_dirs:
-        num_items.append(
-            split_class_dir_fixed(
+    else:
+        transfer.mkdirs(_output_dirs(output, _fixed_splits(fixed), dirs))
+        num_items, train_files = [], []
+        for class_dir in dirs:
+            class_files, li = _split_fixed(
                 class_dir,
-                output,
                 fixed,
                 seed,
-                prog_bar if use_tqdm else None,
                 group_prefix,
                 group,
-                move,
                 formats,
                 shuffle,
+                listings.get(class_dir),
+                _stats(transfer),
+                engine,
+                _fs(transfer),
             )
-        )
+            copy_files(li, class_dir, output, prog_bar, move, transfer)
+            num_items.append(len(class_files))
+            train_files.append(li[0][0])
 
-    if use_tqdm:
-        prog_bar.close()
+        if oversample:
+            with _phase(_stats(transfer), "oversample"):
+                oversample_train(train_files, num_items, dirs, output, oversample, transfer)
 
-    if not oversample:
-        return
+
+def oversample_train(train_files, num_items, dirs, output, oversample=True, transfer=None):
+    """
+    Fills up the train split of each class with random duplicates of its
+    train files (kept in memory, one list per class dir) until all classes
+    have as many items as the largest one.
+
+    With `oversample=True` the duplicates are transferred like the split
+    (copied if the files were moved), `"hardlink"` or `"symlink"` link to the
+    train files and `"manifest"` only writes the number of copies of each
+    train file to `oversample.csv` in the output folder.
+    """
+    if transfer is None:
+        transfer = Transfer()
 
     num_max_items = max(num_items)
-    iteration = zip(num_items, classes_dirs)
+    iteration = zip(train_files, num_items, dirs)
 
     if use_tqdm:
         iteration = tqdm(iteration, desc="Oversampling", unit=" classes")
 
-    for num_items, class_dir in iteration:
+    weights = {}
+    units = []
+    for files, num_items, class_dir in iteration:
         class_name = Path(class_dir).name
         full_path = Path(output) / "train" / class_name
-        train_files = list_files(full_path, formats)
-        train_files = resolve_grouping(train_files, group_prefix, group)
+        copies = {f: 1 for f in files}
 
         for i in range(num_max_items - num_items):
-            f_chosen = random.choice(train_files)
+            f_chosen = random.choice(files)
+            copies[f_chosen] += 1
 
             if not isinstance(f_chosen, tuple):
                 f_chosen = (f_chosen,)
 
-            for f_orig in f_chosen:
-                new_name = f_orig.stem + "_" + str(i) + f_orig.suffix
-                f_dest = f_orig.with_name(new_name)
-                if move == "symlink":
-                    try:
-                        os.symlink(f_orig.resolve(), f_dest)
-                    except FileExistsError:
-                        pass
-                elif move is True or move == "move":
-                    shutil.move(str(f_orig), str(f_dest))
-                else:
-                    shutil.copy2(str(f_orig), str(f_dest))
+            units.append(
+                [
+                    Item(full_path / f.name, full_path, "train", class_name, f.stem + "_" + str(i) + f.suffix)
+                    for f in f_chosen
+                ]
+            )
+
+        for f, n in copies.items():
+            for member in f if isinstance(f, tuple) else (f,):
+                weights[Path("train", class_name, member.name).as_posix()] = (class_name, n)
+
+    if oversample == "manifest":
+        if not transfer.dry_run:
+            with transfer.fs.open(Path(output) / OVERSAMPLE_MANIFEST, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["path", "label", "weight"])
+                writer.writerows((path, label, n) for path, (label, n) in weights.items())
+        return
+
+    with _oversample_transfer(transfer, oversample) as links:
+        links.run(units, None)
+
+
+def _split_derived(entries):
+    """Returns planned (entries, derived), derived entries copy the output of another one (oversampled duplicates)"""
+    destinations = {e.destination for e in entries}
+    derived = [e for e in entries if e.source in destinations]
+    return [e for e in entries if e.source not in destinations], derived
+
+
+def _oversample_transfer(transfer, oversample):
+    """Returns the Transfer of oversampled duplicates, it adds to the plan and result of `transfer`"""
+    if oversample is True:
+        # duplicates of moved files are copies, moving them would remove the originals
+        mode = False if transfer.move is True or transfer.move == "move" else transfer.move
+    else:
+        mode = oversample
+    links = Transfer(
+        mode,
+        transfer.workers,
+        transfer.executor,
+        transfer.dry_run,
+        transfer.stats,
+        overwrite=transfer.overwrite,
+        fs=transfer.fs,
+        preserve_metadata=transfer.preserve_metadata,
+    )
+    links.plan, links.result, links._made = transfer.plan, transfer.result, transfer._made
+    return links
 
 
 def kfold(
@@ -323,67 +912,317 @@ def kfold(
     move="symlink",
     formats=None,
     shuffle=True,
+    workers=1,
+    executor="thread",
+    dry_run=False,
+    assignment="random",
+    fold_store=None,
+    metrics=None,
+    details=False,
+    engine="python",
+    resume=False,
+    overwrite="always",
+    sink=None,
+    fs=None,
+    preserve_metadata="full",
+    num_shards=1,
+    shard_index=0,
+    shard_by="count",
+    scan_cache=None,
 ):
     if k < 2:
         raise ValueError("`k` must be 2 or greater.")
-
-    check_input_format(input, allow_flat=(group != "sibling"))
+    valid_assignment(assignment)
+    valid_engine(engine)
+    if fold_store is not None and fold_store not in FOLD_STORES:
+        raise ValueError(f"Invalid value for fold_store: {fold_store!r}. Use 'symlink', 'hardlink' or 'manifest'.")
+    if resume:
+        _valid_resume(dry_run)
+    if sink is not None:
+        sink = _valid_sink(sink, move, dry_run, fold_store=fold_store, resume=resume)
+    if fs is not None:
+        _reject_options("`fs`", fold_store=fold_store, resume=resume, sink=sink, scan_cache=scan_cache)
+    valid_shards(num_shards, shard_index, shard_by)
+    if num_shards > 1:
+        _reject_options("`num_shards`", resume=resume, sink=sink, move=move is True or move == "move")
+
+    stats, start = Stats() if metrics is not None else None, time.perf_counter()
+    with _phase(stats, "scan"):
+        file_list, group = _file_list_input(input, fs, group_prefix, group, resume=resume, scan_cache=scan_cache)
+        if file_list is not None:
+            input = file_list.root
+        archive = (
+            _archive_input(
+                input,
+                move,
+                fold_store=fold_store,
+                resume=resume,
+                scan_cache=scan_cache,
+                workers=workers > 1,
+                overwrite_hash=overwrite == "if-changed-hash",
+            )
+            if fs is None and file_list is None
+            else None
+        )
+        cache = _scan_cache(scan_cache, input) if scan_cache else None
+        source = archive or file_list or cache
+        dirs, files = check_input_format(input, allow_flat=(group != "sibling"), formats=formats, fs=source or fs)
     valid_extensions(formats)
+    transfer = Transfer(move, workers, executor, dry_run, stats, details, overwrite, fs, source, preserve_metadata)
+
+    split = partial(
+        _split_kfold,
+        input,
+        output,
+        k,
+        seed,
+        None,
+        group_prefix,
+        group,
+        move,
+        formats,
+        shuffle,
+        dirs=dirs,
+        files=files,
+        assignment=assignment,
+        fold_store=fold_store is not None,
+        engine=engine,
+    )
+    journaled = None
+    if resume:
+        # with a fold store only the store is journaled, the links to it are rebuilt
+        journaled = _resume_settings(
+            "kfold",
+            input,
+            seed,
+            group_prefix,
+            group,
+            formats,
+            move,
+            shuffle,
+            engine,
+            k=k,
+            assignment=assignment,
+            fold_store=fold_store,
+        )
+    planned = _plan_split(
+        transfer,
+        split,
+        output,
+        journaled,
+        sink,
+        archive,
+        file_list,
+        (num_shards, shard_index, shard_by),
+        always=fold_store is not None,
+    )
+    if fold_store is not None:
+        # transfer each partition once into the store, the folds are built from it
+        store, todo, _ = planned
+        views = fold_views(store, k, output)
+        if num_shards > 1 and fold_store != "manifest":
+            # only the links to this shard's part of the store, the fold folders of all shards
+            transfer.mkdirs(Path(e.destination).parent for e in views)
+            stored = {e.destination for e in todo}
+            views = [e for e in views if e.source in stored]
 
     if use_tqdm:
         prog_bar = tqdm(desc="Copying files", unit=" files")
 
+    with transfer:
+        if planned is None:
+            _split_kfold(
+                input,
+                output,
+                k,
+                seed,
+                prog_bar if use_tqdm else None,
+                group_prefix,
+                group,
+                move,
+                formats,
+                shuffle,
+                transfer,
+                dirs,
+                files,
+                assignment,
+                engine=engine,
+            )
+        elif fold_store is None:
+            _, todo, derived = planned
+            _transfer_planned(transfer, todo, derived, output, sink, archive, prog_bar=prog_bar if use_tqdm else None)
+        else:
+            transfer.run_plan(todo, prog_bar if use_tqdm else None)
+            if fold_store == "manifest":
+                if not dry_run and shard_index == 0:  # the lists of all folds, written once
+                    write_fold_lists(views, output)
+            else:
+                with Transfer(
+                    fold_store, workers, executor, dry_run, stats, details, preserve_metadata=preserve_metadata
+                ) as links:
+                    links.plan, links.result = transfer.plan, transfer.result
+                    links.run_plan(views, prog_bar if use_tqdm else None)
+
+    if use_tqdm:
+        prog_bar.close()
+
+    if resume:
+        transfer.journal.finish()
+
+    if cache is not None:
+        with _phase(stats, "scan"):
+            cache.save(input)
+
+    _report(metrics, stats, start)
+
+    if dry_run:
+        return transfer.plan
+    return transfer.result
+
+
+def _split_kfold(
+    input,
+    output,
+    k,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle,
+    transfer,
+    dirs,
+    files,
+    assignment,
+    fold_store=False,
+    engine="python",
+):
     if group == "sibling":
         split_sibling_dirs_kfold(
             input,
             output,
             k,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             move,
             formats,
             shuffle,
+            transfer,
+            assignment=assignment,
+            fold_store=fold_store,
+            engine=engine,
         )
-    elif _is_flat(input):
+    elif _is_flat(input, dirs):
+        transfer.mkdirs(_output_dirs(output, _fold_splits(k, fold_store)))
         split_flat_dir_kfold(
             input,
             output,
             k,
             seed,
-            prog_bar if use_tqdm else None,
+            prog_bar,
             group_prefix,
             group,
             move,
             formats,
             shuffle,
+            transfer,
+            files,
+            assignment,
+            fold_store,
+            engine,
         )
     else:
-        for class_dir in list_dirs(input):
+        transfer.mkdirs(_output_dirs(output, _fold_splits(k, fold_store), dirs))
+        for class_dir in dirs:
             split_class_dir_kfold(
                 class_dir,
                 output,
                 k,
                 seed,
-                prog_bar if use_tqdm else None,
+                prog_bar,
                 group_prefix,
                 group,
                 move,
                 formats,
                 shuffle,
+                transfer,
+                assignment=assignment,
+                fold_store=fold_store,
+                engine=engine,
             )
 
-    if use_tqdm:
-        prog_bar.close()
 
-
-def split_class_dir_kfold(class_dir, output, k, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+def split_class_dir_kfold(
+    class_dir,
+    output,
+    k,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    assignment="random",
+    fold_store=False,
+    engine="python",
+):
     """
     Splits a class folder into k folds for cross-validation.
-    Each fold directory gets train/ and val/ subdirectories.
+    Each fold directory gets train/ and val/ subdirectories, with `fold_store`
+    the k partitions are written to folds/partition_j/ instead.
+    """
+    if assignment == "hash":
+        files = _list_grouped(class_dir, group_prefix, group, formats, listing, _stats(transfer), _fs(transfer))
+        partitions = assign_hash(files, [1 / k] * k, seed, Path(class_dir).parent)
+    else:
+        files = setup_files(
+            class_dir, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+        )
+        partitions = _partition(files, k)
+
+    for li in _folds(partitions, fold_store):
+        copy_files(li, class_dir, output, prog_bar, move, transfer)
+
+
+def _folds(partitions, fold_store=False):
+    """Yields the files_type lists to copy per fold, or the partitions for the fold store"""
+    if fold_store:
+        yield [(part, partition_name(j)) for j, part in enumerate(partitions)]
+        return
+    # For each fold, val = partition i, train = all other partitions
+    for i in range(len(partitions)):
+        val_files = partitions[i]
+        train_files = _concat([part for j, part in enumerate(partitions) if j != i])
+        yield [(train_files, f"fold_{i + 1}/train"), (val_files, f"fold_{i + 1}/val")]
+
+
+def _fold_splits(k, fold_store=False):
+    """The split names of k folds (`fold_1/train`, `fold_1/val`, ...), or of the partitions in the fold store"""
+    if fold_store:
+        return [partition_name(j) for j in range(k)]
+    return [f"fold_{i + 1}/{name}" for i in range(k) for name in ("train", "val")]
+
+
+def _fixed_splits(fixed):
+    return SPLIT_NAMES[: 3 if len(fixed) >= 2 else 2]
+
+
+def _output_dirs(output, splits, class_dirs=None):
+    """
+    The output folders of a split: one per split and class (named like its
+    folder in `class_dirs`), or one per split for a flat input
     """
-    files = setup_files(class_dir, seed, group_prefix, group, formats, shuffle)
+    if class_dirs is None:
+        return [Path(output) / split for split in splits]
+    return [Path(output) / split / Path(class_dir).name for split in splits for class_dir in class_dirs]
+
 
-    # Partition files into k roughly equal chunks
+def _partition(files, k):
+    """Partitions files into k roughly equal chunks"""
     fold_size = len(files) // k
     remainder = len(files) % k
     partitions = []
@@ -392,50 +1231,187 @@ def split_class_dir_kfold(class_dir, output, k, seed, prog_bar, group_prefix, gr
         size = fold_size + (1 if i < remainder else 0)
         partitions.append(files[idx : idx + size])
         idx += size
-
-    # For each fold, val = partition i, train = all other partitions
-    for i in range(k):
-        val_files = partitions[i]
-        train_files = [f for j, part in enumerate(partitions) if j != i for f in part]
-        fold_output = str(Path(output) / f"fold_{i + 1}")
-        li = [(train_files, "train"), (val_files, "val")]
-        copy_files(li, class_dir, fold_output, prog_bar, move)
+    return partitions
 
 
-def setup_files(class_dir, seed, group_prefix=None, group=None, formats=None, shuffle=True):
+def setup_files(
+    class_dir,
+    seed,
+    group_prefix=None,
+    group=None,
+    formats=None,
+    shuffle=True,
+    listing=None,
+    stats=None,
+    engine="python",
+    fs=None,
+):
     """
-    Returns sorted (and optionally shuffled) list of filenames
+    Returns sorted (and optionally shuffled) filenames. Pass `listing` to
+    reuse files already listed from `class_dir`, `stats` to time the phases
+    and `fs` to list it from e.g. an archive instead of the disk.
+    With `engine="numpy"` the files are shuffled by `engine.permutation`.
+
+    The files are a FileIndex, a sequence of Paths (or tuples of Paths for
+    groups) which only holds integers until a file is accessed. A list is
+    returned if `group` is a callable.
     """
     random.seed(seed)  # make sure its reproducible
 
-    files = list_files(class_dir, formats)
-    files = resolve_grouping(files, group_prefix, group)
+    files = _list_grouped(class_dir, group_prefix, group, formats, listing, stats, fs)
 
-    files.sort()
-    if shuffle:
-        random.shuffle(files)
+    with _phase(stats, "shuffle"):
+        files.sort()
+        if shuffle:
+            if engine == "numpy":
+                shuffle_numpy(files, seed)
+            elif isinstance(files, FileIndex):
+                files.shuffle()
+            else:
+                random.shuffle(files)
     return files
 
 
-def split_class_dir_ratio(class_dir, output, ratio, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+def _list_grouped(class_dir, group_prefix=None, group=None, formats=None, listing=None, stats=None, fs=None):
+    with _phase(stats, "scan"):
+        if listing is None:
+            files = FileIndex.from_directory(class_dir, formats, fs)
+        elif isinstance(listing, FileIndex):
+            files = listing[:]  # a view, so sorting does not change the listing
+        else:
+            files = list(listing)
+    with _phase(stats, "group"):
+        return resolve_grouping(files, group_prefix, group)
+
+
+def _stats(transfer):
+    return None if transfer is None else transfer.stats
+
+
+def _fs(transfer):
+    return None if transfer is None else transfer.source
+
+
+def _concat(parts):
+    """Joins partitions of files, e.g. all but one fold into train"""
+    if isinstance(parts[0], FileIndex):
+        return FileIndex.concat(parts)
+    return [f for part in parts for f in part]
+
+
+def assign_hash(files, weights, seed, root):
+    """
+    Distributes files (or groups of files) into one bucket per weight by a
+    keyed hash of their paths relative to `root` and the seed. Each file is
+    placed on its own, so adding files never moves existing ones.
+    """
+    buckets = [[] for _ in weights]
+    for f in files:
+        buckets[hash_bucket(_hash_key(f, root), seed, weights)].append(f)
+    return buckets
+
+
+def _hash_key(f, root):
+    members = f if isinstance(f, tuple) else (f,)
+    return "\0".join(Path(x).relative_to(root).as_posix() for x in members)
+
+
+def copy_files_stream(files, ratio, seed, root, output, label, prog_bar, move, transfer=None):
+    """
+    Copies files as they come in, each one is placed by `hash_bucket` into
+    output/split_name/label/ (or output/split_name/ without a label). Nothing
+    is collected, so `files` can be a generator over a huge directory.
+    """
+    if transfer is None:
+        transfer = Transfer(move)
+
+    split_dirs = {}
+    for split in SPLIT_NAMES[: len(ratio)]:
+        split_dirs[split] = Path(output) / split if label is None else Path(output) / split / label
+        transfer.mkdir(split_dirs[split])
+
+    def units():
+        for f in files:
+            split = SPLIT_NAMES[hash_bucket(_hash_key(f, root), seed, ratio)]
+            yield [Item(f, split_dirs[split], split, label)]
+
+    transfer.run(units(), prog_bar)
+
+
+def split_class_dir_ratio(
+    class_dir,
+    output,
+    ratio,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    assignment="random",
+    stream=False,
+    engine="python",
+):
     """
     Splits a class folder
     """
-    files = setup_files(class_dir, seed, group_prefix, group, formats, shuffle)
+    if stream:
+        files = iter_files(class_dir, formats, _fs(transfer))
+        class_dir = Path(class_dir)
+        copy_files_stream(files, ratio, seed, class_dir.parent, output, class_dir.name, prog_bar, move, transfer)
+        return
+
+    if assignment == "hash":
+        files = _list_grouped(class_dir, group_prefix, group, formats, listing, _stats(transfer), _fs(transfer))
+        li = list(zip(assign_hash(files, ratio, seed, Path(class_dir).parent), SPLIT_NAMES))
+        copy_files(li, class_dir, output, prog_bar, move, transfer)
+        return
+
+    files = setup_files(
+        class_dir, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+    )
 
     # the data was shuffled already
     split_train_idx = int(ratio[0] * len(files))
     split_val_idx = split_train_idx + int(ratio[1] * len(files))
 
     li = split_files(files, split_train_idx, split_val_idx, len(ratio) == 3)
-    copy_files(li, class_dir, output, prog_bar, move)
-
-
-def split_class_dir_fixed(class_dir, output, fixed, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+    copy_files(li, class_dir, output, prog_bar, move, transfer)
+
+
+def split_class_dir_fixed(
+    class_dir,
+    output,
+    fixed,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    engine="python",
+):
     """
     Splits a class folder and returns the total number of files
     """
-    files = setup_files(class_dir, seed, group_prefix, group, formats, shuffle)
+    files, li = _split_fixed(
+        class_dir, fixed, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+    )
+    copy_files(li, class_dir, output, prog_bar, move, transfer)
+    return len(files)
+
+
+def _split_fixed(
+    class_dir, fixed, seed, group_prefix, group, formats, shuffle, listing, stats, engine="python", fs=None
+):
+    """Returns the files of a class folder and their split as (files, files_type)"""
+    files = setup_files(class_dir, seed, group_prefix, group, formats, shuffle, listing, stats, engine, fs)
 
     if not len(files) >= sum(fixed):
         raise ValueError(
@@ -460,8 +1436,7 @@ def split_class_dir_fixed(class_dir, output, fixed, seed, prog_bar, group_prefix
         len(fixed) >= 2,
         None if len(fixed) != 3 else fixed[2],
     )
-    copy_files(li, class_dir, output, prog_bar, move)
-    return len(files)
+    return files, li
 
 
 def split_files(files, split_train_idx, split_val_idx, use_test, max_test=None):
@@ -483,61 +1458,103 @@ def split_files(files, split_train_idx, split_val_idx, use_test, max_test=None):
     return li
 
 
-def copy_files(files_type, class_dir, output, prog_bar, move):
+def copy_files(files_type, class_dir, output, prog_bar, move, transfer=None):
     """
     Copies the files from the input folder to the output folder
     """
-    copy_fn = _get_copy_fn(move)
+    if transfer is None:
+        transfer = Transfer(move)
 
     class_name = Path(class_dir).name
     for files, folder_type in files_type:
         full_path = Path(output) / folder_type / class_name
 
-        full_path.mkdir(parents=True, exist_ok=True)
-        for f in files:
-            if prog_bar is not None:
-                prog_bar.update()
-            if isinstance(f, tuple):
-                for x in f:
-                    copy_fn(x, full_path)
-            else:
-                copy_fn(f, full_path)
+        transfer.mkdir(full_path)
+        transfer.run(_units(files, full_path, folder_type, class_name), prog_bar)
 
 
-def copy_files_flat(files_type, output, prog_bar, move):
+def copy_files_flat(files_type, output, prog_bar, move, transfer=None):
     """
     Copies files into output/split_name/ without class subdirectories.
     """
-    copy_fn = _get_copy_fn(move)
+    if transfer is None:
+        transfer = Transfer(move)
 
     for files, folder_type in files_type:
         full_path = Path(output) / folder_type
 
-        full_path.mkdir(parents=True, exist_ok=True)
-        for f in files:
-            if prog_bar is not None:
-                prog_bar.update()
-            if isinstance(f, tuple):
-                for x in f:
-                    copy_fn(x, full_path)
-            else:
-                copy_fn(f, full_path)
+        transfer.mkdir(full_path)
+        transfer.run(_units(files, full_path, folder_type, None), prog_bar)
 
 
-def split_flat_dir_ratio(input_dir, output, ratio, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+def _units(files, full_path, folder_type, label):
+    """Yields one unit of transfer items per file or group of files."""
+    for f in files:
+        if isinstance(f, tuple):
+            yield [Item(x, full_path, folder_type, label) for x in f]
+        else:
+            yield [Item(f, full_path, folder_type, label)]
+
+
+def split_flat_dir_ratio(
+    input_dir,
+    output,
+    ratio,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    assignment="random",
+    stream=False,
+    engine="python",
+):
     """Splits a flat directory (no class subdirs)."""
-    files = setup_files(input_dir, seed, group_prefix, group, formats, shuffle)
+    if stream:
+        files = iter_files(input_dir, formats, _fs(transfer))
+        copy_files_stream(files, ratio, seed, input_dir, output, None, prog_bar, move, transfer)
+        return
+
+    if assignment == "hash":
+        files = _list_grouped(input_dir, group_prefix, group, formats, listing, _stats(transfer), _fs(transfer))
+        li = list(zip(assign_hash(files, ratio, seed, input_dir), SPLIT_NAMES))
+        copy_files_flat(li, output, prog_bar, move, transfer)
+        return
+
+    files = setup_files(
+        input_dir, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+    )
 
     split_train_idx = int(ratio[0] * len(files))
     split_val_idx = split_train_idx + int(ratio[1] * len(files))
 
     li = split_files(files, split_train_idx, split_val_idx, len(ratio) == 3)
-    copy_files_flat(li, output, prog_bar, move)
-
-
-def split_flat_dir_fixed(input_dir, output, fixed, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+    copy_files_flat(li, output, prog_bar, move, transfer)
+
+
+def split_flat_dir_fixed(
+    input_dir,
+    output,
+    fixed,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    engine="python",
+):
     """Splits a flat directory with fixed counts."""
-    files = setup_files(input_dir, seed, group_prefix, group, formats, shuffle)
+    files = setup_files(
+        input_dir, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+    )
 
     if not len(files) >= sum(fixed):
         raise ValueError(
@@ -559,59 +1576,102 @@ def split_flat_dir_fixed(input_dir, output, fixed, seed, prog_bar, group_prefix,
         len(fixed) >= 2,
         None if len(fixed) != 3 else fixed[2],
     )
-    copy_files_flat(li, output, prog_bar, move)
-
-
-def split_flat_dir_kfold(input_dir, output, k, seed, prog_bar, group_prefix, group, move, formats, shuffle=True):
+    copy_files_flat(li, output, prog_bar, move, transfer)
+
+
+def split_flat_dir_kfold(
+    input_dir,
+    output,
+    k,
+    seed,
+    prog_bar,
+    group_prefix,
+    group,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    listing=None,
+    assignment="random",
+    fold_store=False,
+    engine="python",
+):
     """Splits a flat directory into k folds."""
-    files = setup_files(input_dir, seed, group_prefix, group, formats, shuffle)
-
-    fold_size = len(files) // k
-    remainder = len(files) % k
-    partitions = []
-    idx = 0
-    for i in range(k):
-        size = fold_size + (1 if i < remainder else 0)
-        partitions.append(files[idx : idx + size])
-        idx += size
+    if assignment == "hash":
+        files = _list_grouped(input_dir, group_prefix, group, formats, listing, _stats(transfer), _fs(transfer))
+        partitions = assign_hash(files, [1 / k] * k, seed, input_dir)
+    else:
+        files = setup_files(
+            input_dir, seed, group_prefix, group, formats, shuffle, listing, _stats(transfer), engine, _fs(transfer)
+        )
+        partitions = _partition(files, k)
 
-    for i in range(k):
-        val_files = partitions[i]
-        train_files = [f for j, part in enumerate(partitions) if j != i for f in part]
-        fold_output = str(Path(output) / f"fold_{i + 1}")
-        li = [(train_files, "train"), (val_files, "val")]
-        copy_files_flat(li, fold_output, prog_bar, move)
+    for li in _folds(partitions, fold_store):
+        copy_files_flat(li, output, prog_bar, move, transfer)
 
 
-def copy_sibling_files(files_type, type_dir_names, output, prog_bar, move):
+def copy_sibling_files(files_type, type_dir_names, output, prog_bar, move, transfer=None):
     """
     Copies files in sibling mode: each group is a tuple of files across type dirs.
     Output structure: output/split_name/type_dir_name/filename
     """
-    copy_fn = _get_copy_fn(move)
+    if transfer is None:
+        transfer = Transfer(move)
+
+    # the type dirs of the splits with any group
+    transfer.mkdirs(
+        Path(output) / folder_type / type_dir_name
+        for files, folder_type in files_type
+        if len(files)
+        for type_dir_name in type_dir_names
+    )
 
-    for files, folder_type in files_type:
+    def units(files, folder_type):
         for group in files:
-            if prog_bar is not None:
-                prog_bar.update()
-            for type_dir_name, f in zip(type_dir_names, group):
-                full_path = Path(output) / folder_type / type_dir_name
-                full_path.mkdir(parents=True, exist_ok=True)
-                copy_fn(f, full_path)
+            yield [
+                Item(f, Path(output) / folder_type / type_dir_name, folder_type, type_dir_name)
+                for type_dir_name, f in zip(type_dir_names, group)
+            ]
+
+    for files, folder_type in files_type:
+        transfer.run(units(files, folder_type), prog_bar)
 
 
-def split_sibling_dirs_ratio(input_dir, output, ratio, seed, prog_bar, move, formats, shuffle=True):
-    type_dir_names, groups = setup_sibling_files(input_dir, seed, formats, shuffle)
+def split_sibling_dirs_ratio(
+    input_dir,
+    output,
+    ratio,
+    seed,
+    prog_bar,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    assignment="random",
+    engine="python",
+):
+    with _phase(_stats(transfer), "group"):
+        type_dir_names, groups = setup_sibling_files(
+            input_dir, seed, formats, shuffle and assignment != "hash", engine, _fs(transfer)
+        )
+
+    if assignment == "hash":
+        li = list(zip(assign_hash(groups, ratio, seed, input_dir), SPLIT_NAMES))
+        copy_sibling_files(li, type_dir_names, output, prog_bar, move, transfer)
+        return
 
     split_train_idx = int(ratio[0] * len(groups))
     split_val_idx = split_train_idx + int(ratio[1] * len(groups))
 
     li = split_files(groups, split_train_idx, split_val_idx, len(ratio) == 3)
-    copy_sibling_files(li, type_dir_names, output, prog_bar, move)
+    copy_sibling_files(li, type_dir_names, output, prog_bar, move, transfer)
 
 
-def split_sibling_dirs_fixed(input_dir, output, fixed, seed, prog_bar, move, formats, shuffle=True):
-    type_dir_names, groups = setup_sibling_files(input_dir, seed, formats, shuffle)
+def split_sibling_dirs_fixed(
+    input_dir, output, fixed, seed, prog_bar, move, formats, shuffle=True, transfer=None, engine="python"
+):
+    with _phase(_stats(transfer), "group"):
+        type_dir_names, groups = setup_sibling_files(input_dir, seed, formats, shuffle, engine, _fs(transfer))
 
     if not len(groups) >= sum(fixed):
         raise ValueError(
@@ -633,24 +1693,32 @@ def split_sibling_dirs_fixed(input_dir, output, fixed, seed, prog_bar, move, for
         len(fixed) >= 2,
         None if len(fixed) != 3 else fixed[2],
     )
-    copy_sibling_files(li, type_dir_names, output, prog_bar, move)
+    copy_sibling_files(li, type_dir_names, output, prog_bar, move, transfer)
 
 
-def split_sibling_dirs_kfold(input_dir, output, k, seed, prog_bar, move, formats, shuffle=True):
-    type_dir_names, groups = setup_sibling_files(input_dir, seed, formats, shuffle)
+def split_sibling_dirs_kfold(
+    input_dir,
+    output,
+    k,
+    seed,
+    prog_bar,
+    move,
+    formats,
+    shuffle=True,
+    transfer=None,
+    assignment="random",
+    fold_store=False,
+    engine="python",
+):
+    with _phase(_stats(transfer), "group"):
+        type_dir_names, groups = setup_sibling_files(
+            input_dir, seed, formats, shuffle and assignment != "hash", engine, _fs(transfer)
+        )
 
-    fold_size = len(groups) // k
-    remainder = len(groups) % k
-    partitions = []
-    idx = 0
-    for i in range(k):
-        size = fold_size + (1 if i < remainder else 0)
-        partitions.append(groups[idx : idx + size])
-        idx += size
+    if assignment == "hash":
+        partitions = assign_hash(groups, [1 / k] * k, seed, input_dir)
+    else:
+        partitions = _partition(groups, k)
 
-    for i in range(k):
-        val_files = partitions[i]
-        train_files = [f for j, part in enumerate(partitions) if j != i for f in part]
-        fold_output = str(Path(output) / f"fold_{i + 1}")
-        li = [(train_files, "train"), (val_files, "val")]
-        copy_sibling_files(li, type_dir_names, fold_output, prog_bar, move)
+    for li in _folds(partitions, fold_store):
+        copy_sibling_files(li, type_dir_names, output, prog_bar, move, transfer)
@@ -0,0 +1,111 @@
+"""Measurements of a split: time per phase, files and bytes per split and class."""
+
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+
+class Stats:
+    """
+    Collected while a split runs and passed to the `metrics` callback of
+    `ratio`, `fixed` and `kfold`.
+
+    `phases` maps the phases (`scan`, `group`, `shuffle`, `copy`, `plan`,
+    `oversample`) to their wall time in seconds, `seconds` is the wall time of
+    the whole split. `files` and `bytes` (size of the source files) are
+    counted per (split, label), label being None for flat inputs. `skipped` counts the files not transferred by
+    reason: `exists` (link already there), `identical` (copy already there),
+    `unchanged` (incremental splits) and `resumed` (done before an
+    interruption). `fallbacks` counts hardlinks and reflinks that were copied instead.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.phases = defaultdict(float)
+        self.files = Counter()
+        self.bytes = Counter()
+        self.skipped = Counter()
+        self.fallbacks = 0
+
+    def __repr__(self):
+        return f"Stats({self.total_files} files, {self.total_bytes} bytes in {self.seconds:.3f}s)"
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent in the `with` block to the phase `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def add(self, records):
+        """Adds transferred files given as (split, label, size, status, destination)"""
+        for split, label, size, status, _ in records:
+            self.files[split, label] += 1
+            self.bytes[split, label] += size
+            if status in ("exists", "identical"):
+                self.skipped[status] += 1
+            elif status == "fallback":
+                self.fallbacks += 1
+
+    @property
+    def total_files(self):
+        return sum(self.files.values())
+
+    @property
+    def total_bytes(self):
+        return sum(self.bytes.values())
+
+    @property
+    def bytes_per_sec(self):
+        """Throughput of the copy phase"""
+        seconds = self.phases.get("copy")
+        return self.total_bytes / seconds if seconds else None
+
+    def to_dict(self):
+        per_split = [
+            {"split": split, "label": label, "files": n, "bytes": self.bytes[split, label]}
+            for (split, label), n in sorted(self.files.items(), key=lambda x: (x[0][0], x[0][1] or ""))
+        ]
+        return {
+            "seconds": self.seconds,
+            "phases": dict(self.phases),
+            "files": self.total_files,
+            "bytes": self.total_bytes,
+            "bytes_per_sec": self.bytes_per_sec,
+            "skipped": dict(self.skipped),
+            "fallbacks": self.fallbacks,
+            "splits": per_split,
+        }
+
+    def write(self, path):
+        """Writes the stats as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self):
+        """Returns a human readable summary"""
+        lines = [f"{self.total_files} files, {self.total_bytes / 2**20:.1f} MiB in {self.seconds:.2f}s"]
+        if self.bytes_per_sec is not None:
+            lines[0] += f" ({self.bytes_per_sec / 2**20:.1f} MiB/s copying)"
+        splits, split_bytes = Counter(), Counter()
+        for (split, label), n in self.files.items():
+            splits[split] += n
+            split_bytes[split] += self.bytes[split, label]
+        width = max(map(len, [*self.phases, *splits]), default=0) + 2
+        for name, seconds in self.phases.items():
+            lines.append(f"  {name:<{width}}{seconds:>9.3f}s")
+        for split, n in sorted(splits.items()):
+            lines.append(f"  {split:<{width}}{n:>9} files {split_bytes[split] / 2**20:>10.1f} MiB")
+        for reason, n in sorted(self.skipped.items()):
+            lines.append(f"  skipped ({reason}): {n}")
+        if self.fallbacks:
+            lines.append(f"  copied instead of linked: {self.fallbacks}")
+        return "\n".join(lines)
+
+
+def _phase(stats, name):
+    """`stats.phase(name)`, or a no-op without stats"""
+    return nullcontext() if stats is None else stats.phase(name)
@@ -0,0 +1,344 @@
+"""Runs the file transfers (copy, move, link) of a split, serially or on an executor."""
+
+import asyncio
+import hashlib
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+
+from .fs import PRESERVE_METADATA, LocalFS
+from .plan import Plan
+from .result import SplitResult
+from .stats import _phase
+
+# one file to transfer: `src` goes into `dst_dir`, which is `split`/`label` in the output,
+# named `name` (defaults to the name of `src`)
+Item = namedtuple("Item", ["src", "dst_dir", "split", "label", "name"], defaults=[None])
+
+MOVE_MODES = ("move", "copy", "symlink", "hardlink", "reflink")
+
+EXECUTORS = ("thread", "process", "async")
+
+# when to copy over an existing destination: always, or only if its size or modification
+# time (or content, "if-changed-hash") differs from the source
+OVERWRITES = ("always", "if-changed", "if-changed-hash")
+
+# the filesystem of transfers without an `fs`
+LOCAL_FS = LocalFS()
+
+
+def _digest(path, fs=LOCAL_FS):
+    h = hashlib.blake2b()
+    with fs.open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.digest()
+
+
+def _identical(src, dst, overwrite, fs=LOCAL_FS):
+    """Checks if `dst` is an up-to-date copy of `src` according to the overwrite policy"""
+    try:
+        st_dst = fs.stat(dst)
+    except FileNotFoundError:
+        return False
+    st_src = fs.stat(src)
+    if st_src.st_size != st_dst.st_size:
+        return False
+    if overwrite == "if-changed-hash":
+        return _digest(src, fs) == _digest(dst, fs)
+    # copies get the modification time of their source
+    return st_src.st_mtime_ns == st_dst.st_mtime_ns
+
+
+def _transfer_to(move, src, dst, overwrite="always", fs=LOCAL_FS, preserve_metadata="full"):
+    """
+    Copies/moves/links the file `src` to the path `dst` on `fs`, copies keep
+    the `preserve_metadata` of their source. Returns
+    "exists" if the link was already there, "identical" if a copy was skipped
+    by the `overwrite` policy, "fallback" if it was copied instead of linked
+    (e.g. across devices) and None otherwise.
+    """
+    if move == "symlink":
+        try:
+            fs.link(src, dst, symbolic=True)
+        except FileExistsError:
+            return "exists"
+    elif move == "hardlink":
+        try:
+            fs.link(src, dst)
+        except FileExistsError:
+            return "exists"
+        except OSError:
+            fs.copy(src, dst, metadata=preserve_metadata)
+            return "fallback"
+    elif move is True or move == "move":
+        fs.move(src, dst)
+    elif overwrite != "always" and _identical(src, dst, overwrite, fs):
+        return "identical"
+    else:
+        return fs.copy(src, dst, clone=move == "reflink", metadata=preserve_metadata)
+
+
+def _transfer_file(move, src, dst_dir, name=None, overwrite="always", fs=LOCAL_FS, preserve_metadata="full"):
+    """Copies/moves/links the file `src` into `dst_dir`, optionally renamed to `name`."""
+    src = Path(src)
+    return _transfer_to(move, src, Path(dst_dir) / (name or src.name), overwrite, fs, preserve_metadata)
+
+
+def _get_copy_fn(move, overwrite="always", fs=LOCAL_FS, preserve_metadata="full"):
+    """Return a function(src, dst_dir, name=None) that copies/moves/links a file into dst_dir."""
+    if not (move is True or move is False or move in MOVE_MODES):
+        raise ValueError(f"Invalid value for move: {move!r}. Use True, False, 'symlink', 'hardlink' or 'reflink'.")
+    if overwrite not in OVERWRITES:
+        raise ValueError(
+            f"Invalid value for overwrite: {overwrite!r}. Use 'always', 'if-changed' or 'if-changed-hash'."
+        )
+    if preserve_metadata not in PRESERVE_METADATA:
+        raise ValueError(f"Invalid value for preserve_metadata: {preserve_metadata!r}. Use 'none', 'times' or 'full'.")
+    if overwrite == "if-changed" and preserve_metadata == "none":
+        raise ValueError(
+            "`overwrite='if-changed'` compares modification times, use `preserve_metadata='times'` or 'full'."
+        )
+    # a partial of a module-level function can be pickled and sent to worker processes
+    return partial(_transfer_file, move, overwrite=overwrite, fs=fs, preserve_metadata=preserve_metadata)
+
+
+def _transfer_unit(copy_fn, unit, measure=False, fs=LOCAL_FS):
+    """
+    Transfers the items of a unit and returns (split, label, size, status,
+    destination) per item, size and destination only with `measure`
+    """
+    records = []
+    for item in unit:
+        size = fs.stat(item.src).st_size if measure else 0  # before a move
+        status = copy_fn(item.src, item.dst_dir, item.name)
+        destination = Path(item.dst_dir) / (item.name or Path(item.src).name) if measure else None
+        records.append((item.split, item.label, size, status, destination))
+    return records
+
+
+class Transfer:
+    """
+    Transfers units of files into the output folder. A unit is a list of
+    Item, i.e. a single file or a group of files, and the progress bar
+    advances once per unit.
+
+    With `workers` > 1 the units are fanned out on an executor: `"thread"`
+    (default), `"process"`, `"async"` or any `concurrent.futures.Executor`.
+    Only the order in which files land on disk changes, not where they land.
+
+    `"async"` drives up to `workers` transfers from an asyncio event loop,
+    the blocking file operations run in a thread each. Meant for high latency
+    filesystems (NFS, FUSE mounts of object stores) and many workers. If the
+    caller already runs an event loop, the transfers get a loop in a thread.
+
+    With `dry_run=True` nothing is created, the units are recorded in `plan`.
+    Set `journal` (a journal.Journal) to checkpoint the finished files.
+
+    With `overwrite="if-changed"` copies (and reflinks) are skipped if the
+    destination has the size and modification time of the source,
+    `"if-changed-hash"` compares the size and a hash of the content instead.
+
+    Copies keep the `preserve_metadata` of their source: `"full"` (default)
+    like `shutil.copy2`, only the access and modification `"times"` or
+    `"none"`, which saves a few syscalls per file.
+
+    `fs` is the filesystem (see the fs module) files are read and written
+    with, the local disk by default. `source` is what the split functions
+    list the input from if it is not `fs`, e.g. an archive.ArchiveInput.
+
+    The transferred files are counted in `result`, a SplitResult. Pass
+    `details=True` to also collect their sizes and destinations and a `Stats`
+    as `stats` to time the transfers (or the planning in a dry run).
+    """
+
+    def __init__(
+        self,
+        move=False,
+        workers=1,
+        executor="thread",
+        dry_run=False,
+        stats=None,
+        details=False,
+        overwrite="always",
+        fs=None,
+        source=None,
+        preserve_metadata="full",
+    ):
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError(f"`workers` must be a positive integer, got {workers!r}.")
+        if not (executor in EXECUTORS or isinstance(executor, Executor)):
+            raise ValueError(
+                f"Invalid value for executor: {executor!r}. Use 'thread', 'process', 'async' or an Executor."
+            )
+        if executor == "process" and fs is not None and not isinstance(fs, LocalFS):
+            raise ValueError(f"Worker processes cannot share {fs!r}, use `executor='thread'`.")
+
+        self.move = move
+        self.overwrite = overwrite
+        self.preserve_metadata = preserve_metadata
+        self.fs = fs if fs is not None else LOCAL_FS
+        self.source = source if source is not None else fs
+        self.copy_fn = _get_copy_fn(move, overwrite, self.fs, preserve_metadata)
+        self.workers = workers
+        self.executor = executor
+        self.dry_run = dry_run
+        self.plan = Plan()
+        self.result = SplitResult(details)
+        self.stats = stats
+        self.journal = None
+        self._pool = None
+        self._made = set()  # directories created (or known to exist)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+
+    def close(self, cancel=False):
+        # executors passed in by the caller are theirs to shut down
+        if self._pool is not None and self._pool is not self.executor:
+            self._pool.shutdown(wait=True, cancel_futures=cancel)
+        self._pool = None
+        if self.journal is not None:
+            self.journal.close()  # also after a failure, a rerun skips what was done
+
+    def _get_pool(self):
+        if self._pool is None:
+            if isinstance(self.executor, Executor):
+                self._pool = self.executor
+            elif self.executor == "process":
+                self._pool = ProcessPoolExecutor(self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(self.workers)
+        return self._pool
+
+    def mkdir(self, path):
+        path = Path(path)
+        if not self.dry_run and path not in self._made:
+            self.fs.mkdir(path)
+            self._made.add(path)
+
+    def mkdirs(self, paths):
+        """
+        Creates the output directories `paths` up front, so the transfers into
+        them need no directory syscalls. Each one is created once, only the
+        deepest ones are created (with their parents), on the executor with
+        `workers` > 1, e.g. for network filesystems.
+        """
+        if self.dry_run:
+            self.plan.dirs.update(Path(p) for p in paths)
+            return
+        paths = {Path(p) for p in paths} - self._made
+        parents = {parent for p in paths for parent in p.parents}
+        leaves = sorted(paths - parents)
+        if self.workers > 1 and len(leaves) > 1:
+            list(self._get_pool().map(self.fs.mkdir, leaves))
+        else:
+            for path in leaves:
+                self.fs.mkdir(path)
+        self._made |= paths | parents
+
+    def run(self, units, prog_bar):
+        """
+        Transfers all units, the iterable is consumed lazily
+        """
+        with _phase(self.stats, "plan" if self.dry_run else "copy"):
+            self._run(units, prog_bar)
+
+    def _run(self, units, prog_bar):
+        if self.dry_run:
+            for unit in units:
+                self.plan.add_unit(unit)
+                if prog_bar is not None:
+                    prog_bar.update()
+            return
+
+        measure = self._measure()
+        if self.workers == 1 and not isinstance(self.executor, Executor):
+            for unit in units:
+                self._record(_transfer_unit(self.copy_fn, unit, measure, self.fs))
+                if prog_bar is not None:
+                    prog_bar.update()
+            return
+
+        if self.executor == "async":
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:  # no event loop in this thread
+                asyncio.run(self._run_async(units, prog_bar))
+            else:
+                # called from a running event loop (e.g. in a notebook), run ours in a thread of its own
+                with ThreadPoolExecutor(1) as runner:
+                    runner.submit(asyncio.run, self._run_async(units, prog_bar)).result()
+            return
+
+        pool = self._get_pool()
+        # bound the number of queued units so huge (or lazy) inputs do not pile up in memory
+        max_pending = self.workers * 4
+        pending = set()
+        for unit in units:
+            pending.add(pool.submit(_transfer_unit, self.copy_fn, list(unit), measure, self.fs))
+            if len(pending) >= max_pending:
+                pending = self._collect(pending, prog_bar, FIRST_COMPLETED)
+        self._collect(pending, prog_bar)
+
+    def _measure(self):
+        return self.stats is not None or self.result.details or self.journal is not None
+
+    def _record(self, records):
+        self.result.add(records)
+        if self.stats is not None:
+            self.stats.add(records)
+        if self.journal is not None:
+            self.journal.done(r[4] for r in records)
+
+    def run_plan(self, entries, prog_bar):
+        """
+        Transfers planned entries (see Plan), entries of the same group form one unit
+        """
+        dirs = entries.dirs if isinstance(entries, Plan) else set()
+        self.mkdirs(dirs | {Path(e.destination).parent for e in entries})
+        units = (
+            [Item(e.source, Path(e.destination).parent, e.split, e.label, Path(e.destination).name) for e in unit]
+            for _, unit in groupby(entries, key=lambda e: e.group)
+        )
+        self.run(units, prog_bar)
+
+    async def _run_async(self, units, prog_bar):
+        loop = asyncio.get_running_loop()
+        # the default executor would cap the number of threads far below what network filesystems like
+        loop.set_default_executor(ThreadPoolExecutor(self.workers))
+        pending = set()
+        try:
+            for unit in units:
+                task = asyncio.to_thread(_transfer_unit, self.copy_fn, list(unit), self._measure(), self.fs)
+                pending.add(asyncio.ensure_future(task))
+                if len(pending) >= self.workers:
+                    pending = await self._collect_async(pending, prog_bar, asyncio.FIRST_COMPLETED)
+            await self._collect_async(pending, prog_bar, asyncio.ALL_COMPLETED)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+    async def _collect_async(self, pending, prog_bar, return_when):
+        if not pending:
+            return pending
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            self._record(task.result())  # re-raises errors from the transfers
+            if prog_bar is not None:
+                prog_bar.update()
+        return pending
+
+    def _collect(self, pending, prog_bar, return_when="ALL_COMPLETED"):
+        done, pending = wait(pending, return_when=return_when)
+        for future in done:
+            self._record(future.result())  # re-raises errors from the workers
+            if prog_bar is not None:
+                prog_bar.update()
+        return pending
@@ -1,20 +1,76 @@
+import hashlib
+import os
 from pathlib import Path
 
 
-def list_dirs(directory):
+def scan_dir(directory, formats=None, fs=None):
+    """
+    Lists a directory in a single pass and returns (dirs, files). Files are
+    optionally filtered by formats, hidden files are skipped. Uses the file
+    type cached by `os.scandir` instead of a stat call per entry, or lists
+    `fs` (e.g. an archive.ArchiveInput) instead of the disk.
+    """
+    if fs is not None:
+        dirs, names = fs.scan(directory)
+        files = [Path(directory) / name for name in names]
+        return dirs, [f for f in files if not formats or f.suffix in formats]
+
+    dirs, files = [], []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs.append(Path(entry.path))
+            elif entry.is_file() and not entry.name.startswith("."):
+                f = Path(entry.path)
+                if not formats or f.suffix in formats:
+                    files.append(f)
+    return dirs, files
+
+
+def iter_files(directory, formats=None, fs=None):
+    """
+    Yields the files of a directory while it is being scanned, with the same
+    filtering as `list_files` but without holding the listing in memory
+    """
+    if fs is not None:
+        yield from scan_dir(directory, formats, fs)[1]
+        return
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith("."):
+                f = Path(entry.path)
+                if not formats or f.suffix in formats:
+                    yield f
+
+
+def list_dirs(directory, fs=None):
     """
     Returns all directories in a given directory
     """
-    return [f for f in Path(directory).iterdir() if f.is_dir()]
+    if fs is not None:
+        return fs.scan(directory)[0]
+    with os.scandir(directory) as it:
+        return [Path(entry.path) for entry in it if entry.is_dir()]
 
 
-def list_files(directory, formats=None):
+def list_files(directory, formats=None, fs=None):
     """
     Returns all files in a given directory, optionally filtered by formats
     """
-    if formats:
-        return [
-            f for f in Path(directory).iterdir() if f.is_file() and not f.name.startswith(".") and f.suffix in formats
-        ]
-    else:
-        return [f for f in Path(directory).iterdir() if f.is_file() and not f.name.startswith(".")]
+    return scan_dir(directory, formats, fs)[1]
+
+
+def hash_bucket(key, seed, weights):
+    """
+    Maps the string `key` to an index of `weights` (e.g. a split ratio) with a
+    hash keyed by `seed`. The same key and seed always land in the same bucket,
+    no matter which other keys exist.
+    """
+    digest = hashlib.blake2b(key.encode(), digest_size=8, key=str(seed).encode()).digest()
+    x = int.from_bytes(digest, "big") / 2**64
+    total = 0
+    for i, weight in enumerate(weights):
+        total += weight
+        if x < total:
+            return i
+    return len(weights) - 1
@@ -1038,3 +1038,1429 @@ def test_flat_oversample_error():
 
     with pytest.raises(ValueError, match="flat input directory"):
         fixed(input_dir, output_dir, fixed=(2, 2), oversample=True)
+
+
+# --- Parallel copying ---
+
+
+def _split_layout(output_dir):
+    return sorted(str(f.relative_to(output_dir)) for f in pathlib.Path(output_dir).rglob("*") if f.is_file())
+
+
+def test_ratio_workers_same_assignment():
+    """workers > 1 copies every file to the same split as a serial run."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    output_dir2 = os.path.join(os.path.dirname(__file__), "output2")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+    ratio(input_dir, output_dir, group="stem")
+    ratio(input_dir, output_dir2, group="stem", workers=4)
+
+    assert _split_layout(output_dir) == _split_layout(output_dir2)
+
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+
+def test_kfold_workers_process_pool():
+    """Process pool executor for sibling kfold."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_sibling")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    kfold(input_dir, output_dir, k=3, group="sibling", move=False, workers=2, executor="process")
+
+    input_jpgs = len(list(pathlib.Path(input_dir).glob("**/*.jpg")))
+    for fold_dir in pathlib.Path(output_dir).iterdir():
+        train_jpgs = len(list((fold_dir / "train").rglob("*.jpg")))
+        val_jpgs = len(list((fold_dir / "val").rglob("*.jpg")))
+        assert train_jpgs + val_jpgs == input_jpgs
+
+
+def test_ratio_workers_async():
+    """The asyncio backend copies every file to the same split as a serial run."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    output_dir2 = os.path.join(os.path.dirname(__file__), "output2")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+    ratio(input_dir, output_dir, group="stem")
+    ratio(input_dir, output_dir2, group="stem", workers=8, executor="async")
+
+    assert _split_layout(output_dir) == _split_layout(output_dir2)
+
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+
+def test_ratio_workers_async_in_event_loop(tmp_path):
+    """The asyncio backend also works when called from a running event loop, e.g. in a notebook."""
+    import asyncio
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+
+    async def main():
+        ratio(input_dir, tmp_path / "async", group="stem", workers=4, executor="async")
+
+    ratio(input_dir, tmp_path / "serial", group="stem")
+    asyncio.run(main())
+
+    assert _split_layout(tmp_path / "serial") == _split_layout(tmp_path / "async")
+
+
+def test_async_transfer_errors():
+    """Errors of a transfer are raised from the event loop."""
+    from splitfolders.transfer import Item, Transfer
+
+    units = [[Item(pathlib.Path("does-not-exist.jpg"), pathlib.Path("nowhere"), "train", None)]]
+    with Transfer(workers=4, executor="async") as transfer:
+        with pytest.raises(FileNotFoundError):
+            transfer.run(units, None)
+
+
+def test_invalid_workers():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="workers"):
+        ratio(input_dir, output_dir, workers=0)
+
+    with pytest.raises(ValueError, match="executor"):
+        fixed(input_dir, output_dir, workers=2, executor="gpu")
+
+
+# --- Directory listing ---
+
+
+def test_scan_dir(tmp_path):
+    """scan_dir lists dirs and (non-hidden, format-filtered) files in one pass."""
+    from splitfolders.utils import list_dirs, list_files, scan_dir
+
+    (tmp_path / "sub").mkdir()
+    for name in ("a.jpg", "b.txt", ".hidden.jpg"):
+        (tmp_path / name).touch()
+
+    dirs, files = scan_dir(tmp_path, [".jpg"])
+    assert dirs == [tmp_path / "sub"]
+    assert files == [tmp_path / "a.jpg"]
+
+    assert list_dirs(tmp_path) == [tmp_path / "sub"]
+    assert sorted(list_files(tmp_path)) == [tmp_path / "a.jpg", tmp_path / "b.txt"]
+
+
+# --- Hardlink / reflink ---
+
+
+def test_ratio_hardlink():
+    """move='hardlink' creates real files sharing the inode of the input."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    ratio(input_dir, output_dir, move="hardlink")
+
+    outputs = list(pathlib.Path(output_dir).rglob("*.jpg"))
+    assert len(outputs) == len(list(pathlib.Path(input_dir).glob("**/*.jpg")))
+    for f in outputs:
+        assert not f.is_symlink()
+        assert os.path.samefile(f, pathlib.Path(input_dir, f.parent.name, f.name))
+
+
+def test_fixed_oversample_reflink():
+    """move='reflink' produces real files with the same content (copy fallback if unsupported)."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    fixed(input_dir, output_dir, fixed=(2, 2), oversample=True, move="reflink")
+
+    for f in pathlib.Path(output_dir, "val").rglob("*.jpg"):
+        assert not f.is_symlink()
+        assert f.read_bytes() == pathlib.Path(input_dir, f.parent.name, f.name).read_bytes()
+    train_cats = len(list(pathlib.Path(output_dir, "train", "cats").glob("*.jpg")))
+    train_dogs = len(list(pathlib.Path(output_dir, "train", "dogs").glob("*.jpg")))
+    assert train_cats == train_dogs
+
+
+def test_reflink_over_hardlink(tmp_path):
+    """A reflink split over the hardlinks of an earlier split does not empty the input."""
+    input_dir = tmp_path / "imgs"
+    output_dir = tmp_path / "output"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs"), input_dir)
+    contents = {f: f.read_bytes() for f in input_dir.rglob("*.jpg")}
+
+    ratio(input_dir, output_dir, move="hardlink")
+    with pytest.raises(shutil.SameFileError):
+        ratio(input_dir, output_dir, move="reflink")
+    assert {f: f.read_bytes() for f in input_dir.rglob("*.jpg")} == contents
+
+
+# --- Dry run / manifest ---
+
+
+def test_ratio_dry_run_matches_copy():
+    """dry_run=True returns the same assignment a real run produces, without creating files."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    plan = ratio(input_dir, output_dir, group="stem", dry_run=True)
+    assert not pathlib.Path(output_dir).exists()
+
+    ratio(input_dir, output_dir, group="stem")
+    planned = sorted(str(e.destination.relative_to(output_dir)) for e in plan)
+    assert planned == _split_layout(output_dir)
+
+    # grouped files share a group number
+    groups = {}
+    for e in plan:
+        groups.setdefault(e.group, set()).add(e.source.stem)
+    assert all(len(stems) == 1 for stems in groups.values())
+
+
+def test_kfold_dry_run_splits():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_flat")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    plan = kfold(input_dir, output_dir, k=2, dry_run=True)
+
+    counts = plan.counts()
+    assert counts[("fold_1/train", None)] + counts[("fold_1/val", None)] == 10
+    assert set(split for split, _ in counts) == {"fold_1/train", "fold_1/val", "fold_2/train", "fold_2/val"}
+
+
+def test_dry_run_write_manifest(tmp_path):
+    import csv
+    import json
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_sibling")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    plan = fixed(input_dir, output_dir, fixed=(1, 1), group="sibling", dry_run=True)
+
+    plan.write(tmp_path / "plan.csv")
+    with open(tmp_path / "plan.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 10
+    assert {r["label"] for r in rows} == {"images", "annotations"}
+
+    plan.write(tmp_path / "plan.jsonl")
+    records = [json.loads(line) for line in open(tmp_path / "plan.jsonl")]
+    assert [r["destination"] for r in records] == [r["destination"] for r in rows]
+
+    with pytest.raises(ValueError, match="manifest format"):
+        plan.write(tmp_path / "plan.parquet")
+
+
+def test_dry_run_oversample():
+    """The duplicates of oversampling are planned from the in-memory assignment."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    plan = fixed(input_dir, output_dir, fixed=(2, 2), oversample=True, dry_run=True)
+
+    assert not os.path.exists(output_dir)
+    counts = plan.counts()
+    assert counts["train", "cats"] == counts["train", "dogs"]
+    duplicates = [e for e in plan if e.source.parent == e.destination.parent]
+    assert duplicates and all(e.split == "train" for e in duplicates)
+
+
+# --- Incremental re-split ---
+
+
+def test_ratio_incremental(tmp_path):
+    """Rerunning with incremental=True only copies new files and removes vanished ones."""
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs"), input_dir)
+
+    ratio(input_dir, output_dir, ratio=(0.5, 0.5), incremental=True)
+    before = {f.relative_to(output_dir) for f in output_dir.rglob("*.jpg")}
+    assert len(before) == 20
+    # mark the outputs, a file that gets copied again loses its mark
+    for f in before:
+        (output_dir / f).write_bytes(b"marked")
+
+    shutil.copy(input_dir / "cats" / "andrew-umansky-714774-unsplash.jpg", input_dir / "cats" / "new.jpg")
+    (input_dir / "dogs" / "jamie-street-804226-unsplash.jpg").unlink()
+
+    ratio(input_dir, output_dir, ratio=(0.5, 0.5), incremental=True)
+    after = {f.relative_to(output_dir) for f in output_dir.rglob("*.jpg")}
+
+    assert [p.name for p in after - before] == ["new.jpg"]
+    assert [p.name for p in before - after] == ["jamie-street-804226-unsplash.jpg"]
+    assert all((output_dir / f).read_bytes() == b"marked" for f in before & after)
+
+
+def test_ratio_incremental_settings_changed(tmp_path):
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+
+    ratio(input_dir, output_dir, incremental=True)
+    with pytest.raises(ValueError, match="different settings"):
+        ratio(input_dir, output_dir, seed=42, incremental=True)
+
+    with pytest.raises(ValueError, match="incremental"):
+        ratio(input_dir, output_dir, move=True, incremental=True)
+
+
+# --- Hash assignment ---
+
+
+def test_ratio_hash_assignment_stable(tmp_path):
+    """assignment='hash' keeps every existing file in its split when files are added."""
+    input_dir = tmp_path / "input"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs_texts"), input_dir)
+
+    ratio(input_dir, tmp_path / "out1", group="stem", assignment="hash")
+    for i in range(5):
+        (input_dir / "cats" / f"extra_{i}.jpg").touch()
+        (input_dir / "cats" / f"extra_{i}.txt").touch()
+    ratio(input_dir, tmp_path / "out2", group="stem", assignment="hash")
+
+    before = set(_split_layout(tmp_path / "out1"))
+    after = set(_split_layout(tmp_path / "out2"))
+    assert before <= after
+    assert len(after - before) == 10
+
+    # groups stay together
+    for split in ("train", "val", "test"):
+        stems = [pathlib.Path(f).stem for f in after if f.startswith(split)]
+        assert all(stems.count(stem) == 2 for stem in stems)
+
+
+def test_kfold_hash_assignment():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_sibling")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    plan = kfold(input_dir, output_dir, k=2, group="sibling", assignment="hash", dry_run=True)
+    plan2 = kfold(input_dir, output_dir, k=2, group="sibling", assignment="hash", dry_run=True)
+    assert list(plan) == list(plan2)
+
+    counts = plan.counts()
+    for fold in ("fold_1", "fold_2"):
+        assert counts[(f"{fold}/train", "images")] + counts[(f"{fold}/val", "images")] == 5
+
+
+def test_invalid_assignment():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="assignment"):
+        ratio(input_dir, output_dir, assignment="md5")
+
+
+# --- Streaming ---
+
+
+def test_ratio_stream_matches_hash():
+    """stream=True copies each file to the same split as the non-streaming hash assignment."""
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    output_dir2 = os.path.join(os.path.dirname(__file__), "output2")
+
+    for name in ("imgs", "imgs_flat"):
+        input_dir = os.path.join(os.path.dirname(__file__), name)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        shutil.rmtree(output_dir2, ignore_errors=True)
+
+        ratio(input_dir, output_dir, assignment="hash")
+        ratio(input_dir, output_dir2, assignment="hash", stream=True, workers=2)
+
+        assert _split_layout(output_dir) == _split_layout(output_dir2)
+
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+
+def test_ratio_stream_errors():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="requires `assignment='hash'`"):
+        ratio(input_dir, output_dir, stream=True)
+
+    with pytest.raises(ValueError, match="grouping"):
+        ratio(input_dir, output_dir, group="stem", assignment="hash", stream=True)
+
+
+# --- Compact file index ---
+
+
+def test_file_index_matches_path_lists():
+    """FileIndex sorts, groups and shuffles exactly like the lists of Paths it replaces."""
+    import random
+
+    from splitfolders import setup_files
+    from splitfolders.grouping import group_by_prefix, group_by_stem
+    from splitfolders.index import FileIndex
+    from splitfolders.utils import list_files
+
+    class_dir = pathlib.Path(os.path.dirname(__file__), "imgs_prefix_collision", "cats")
+    index = FileIndex.from_directory(class_dir)
+    assert sorted(index) == sorted(list_files(class_dir))
+    assert list(index.group_by_stem()) == sorted(group_by_stem(list_files(class_dir)))
+    assert list(index.group_by_prefix(2)) == sorted(group_by_prefix(list_files(class_dir), 2))
+
+    files = setup_files(class_dir, 1337, group="stem")
+    assert isinstance(files, FileIndex)
+
+    random.seed(1337)
+    expected = sorted(group_by_stem(list_files(class_dir)))
+    random.shuffle(expected)
+    assert list(files) == expected
+    assert list(files[1:]) == expected[1:]
+    assert list(FileIndex.concat([files[1:], files[:1]])) == expected[1:] + expected[:1]
+
+
+# --- Shared fold store ---
+
+
+def _fold_names(output_dir, k):
+    return {
+        (i, t): sorted(f.name for f in (pathlib.Path(output_dir) / f"fold_{i}" / t).rglob("*.jpg"))
+        for i in range(1, k + 1)
+        for t in ("train", "val")
+    }
+
+
+@pytest.mark.parametrize("fold_store", ["symlink", "hardlink"])
+def test_kfold_fold_store_links(fold_store):
+    """Each file is copied once into folds/, the folds link to it with the same assignment as a plain kfold."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    output_dir2 = os.path.join(os.path.dirname(__file__), "output2")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+    kfold(input_dir, output_dir, k=3, move=False)
+    kfold(input_dir, output_dir2, k=3, move=False, fold_store=fold_store)
+
+    assert _fold_names(output_dir, 3) == _fold_names(output_dir2, 3)
+
+    store = [f for f in pathlib.Path(output_dir2, "folds").rglob("*") if f.is_file()]
+    assert len(store) == len(list(pathlib.Path(input_dir).rglob("*.jpg")))
+    assert not any(f.is_symlink() for f in store)
+
+    for f in pathlib.Path(output_dir2, "fold_1").rglob("*.jpg"):
+        if fold_store == "symlink":
+            assert f.resolve().parent.parent.parent.name == "folds"
+        else:
+            assert f.stat().st_nlink == 4  # the store and 3 folds
+
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+
+def test_kfold_fold_store_manifest():
+    """With fold_store='manifest' the folds are text files listing paths into the store."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    kfold(input_dir, output_dir, k=3, move=False, fold_store="manifest")
+
+    num_files = len(list(pathlib.Path(input_dir).rglob("*.jpg")))
+    for i in range(1, 4):
+        train = pathlib.Path(output_dir, f"fold_{i}", "train.txt").read_text().split()
+        val = pathlib.Path(output_dir, f"fold_{i}", "val.txt").read_text().split()
+        assert len(train) + len(val) == num_files
+        assert all(p.startswith(f"folds/partition_{i}/") for p in val)
+        assert all(pathlib.Path(output_dir, p).is_file() for p in train + val)
+
+
+def test_kfold_fold_store_dry_run():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_sibling")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    plan = kfold(input_dir, output_dir, k=2, group="sibling", fold_store="symlink", dry_run=True)
+
+    assert not os.path.exists(output_dir)
+    splits = {e.split for e in plan}
+    assert splits == {
+        "folds/partition_1",
+        "folds/partition_2",
+        "fold_1/train",
+        "fold_1/val",
+        "fold_2/train",
+        "fold_2/val",
+    }
+    store = [e for e in plan if e.split.startswith("folds/")]
+    assert all(e.source in {s.destination for s in store} for e in plan if not e.split.startswith("folds/"))
+
+    with pytest.raises(ValueError, match="fold_store"):
+        kfold(input_dir, output_dir, k=2, group="sibling", fold_store="copy")
+
+
+# --- Metrics ---
+
+
+def test_ratio_metrics():
+    """The metrics callback gets the files and bytes per split and class and the time per phase."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    collected = []
+    ratio(input_dir, output_dir, group="stem", metrics=collected.append)
+    (stats,) = collected
+
+    output_files = [f for f in pathlib.Path(output_dir).rglob("*") if f.is_file()]
+    assert stats.total_files == len(output_files)
+    assert stats.total_bytes == sum(f.stat().st_size for f in output_files)
+    for (split, label), n in stats.files.items():
+        assert n == len(list(pathlib.Path(output_dir, split, label).iterdir()))
+    assert {"scan", "group", "shuffle", "copy"} <= set(stats.phases)
+    assert stats.seconds >= stats.phases["copy"]
+    assert stats.to_dict()["files"] == stats.total_files
+
+
+def test_metrics_skipped_links():
+    """Links that already exist are counted as skipped."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    collected = []
+    kfold(input_dir, output_dir, k=2, metrics=collected.append)
+    kfold(input_dir, output_dir, k=2, workers=2, metrics=collected.append)
+
+    assert not collected[0].skipped
+    assert collected[1].skipped["exists"] == collected[1].total_files == collected[0].total_files
+
+
+def test_fixed_oversample_metrics():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    collected = []
+    fixed(input_dir, output_dir, fixed=(2, 2), oversample=True, metrics=collected.append)
+    (stats,) = collected
+
+    assert "oversample" in stats.phases
+    train = pathlib.Path(output_dir, "train")
+    assert stats.files["train", "cats"] == stats.files["train", "dogs"] == len(list((train / "cats").iterdir()))
+
+
+# --- Split result ---
+
+
+def test_ratio_result():
+    """ratio returns what went where without walking the output."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    result = ratio(input_dir, output_dir, details=True)
+
+    for (split, label), n in result.files.items():
+        files = sorted(pathlib.Path(output_dir, split, label).iterdir())
+        assert n == len(files)
+        assert sorted(result.destinations[split, label]) == files
+        assert result.bytes[split, label] == sum(f.stat().st_size for f in files)
+    assert len(result) == len(list(pathlib.Path(input_dir).rglob("*.jpg")))
+    assert result.labels(bytes=True)["cats"] == sum(f.stat().st_size for f in pathlib.Path(input_dir, "cats").iterdir())
+
+
+def test_kfold_result_folds():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_flat")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    result = kfold(input_dir, output_dir, k=3)
+
+    num_files = len(list(pathlib.Path(input_dir).iterdir()))
+    assert result.folds() == {f"fold_{i}": num_files for i in (1, 2, 3)}
+    assert result.labels() == {}  # flat input, no classes
+    assert result.destinations is None
+    with pytest.raises(ValueError, match="details"):
+        result.splits(bytes=True)
+
+
+def test_fixed_result_oversample():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    result = fixed(input_dir, output_dir, fixed=(2, 2), oversample=True)
+
+    for (split, label), n in result.files.items():
+        assert n == len(list(pathlib.Path(output_dir, split, label).iterdir()))
+
+
+# --- Oversampling by link ---
+
+
+def test_fixed_oversample_hardlink():
+    """Duplicates are hardlinks to the train files, the classes end up balanced."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    result = fixed(input_dir, output_dir, fixed=(2, 2), oversample="hardlink")
+
+    train = pathlib.Path(output_dir, "train")
+    cats, dogs = list((train / "cats").iterdir()), list((train / "dogs").iterdir())
+    assert len(cats) == len(dogs) == result.files["train", "cats"]
+    duplicates = [f for f in cats + dogs if f.stem.rsplit("_", 1)[-1].isdigit()]
+    assert duplicates and all(f.stat().st_nlink >= 2 for f in duplicates)
+
+
+def test_fixed_oversample_manifest():
+    """With oversample='manifest' no duplicates are written, only the weight of each train file."""
+    import csv
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    fixed(input_dir, output_dir, fixed=(2, 2), oversample="manifest")
+
+    with open(pathlib.Path(output_dir, "oversample.csv")) as f:
+        rows = list(csv.DictReader(f))
+
+    weights = {"cats": 0, "dogs": 0}
+    for row in rows:
+        assert pathlib.Path(output_dir, row["path"]).is_file()
+        weights[row["label"]] += int(row["weight"])
+    assert weights["cats"] == weights["dogs"]
+    train = pathlib.Path(output_dir, "train")
+    assert len(rows) == len(list(train.rglob("*.jpg")))
+
+    with pytest.raises(ValueError, match="oversample"):
+        fixed(input_dir, output_dir, fixed=(2, 2), oversample="copy")
+
+
+# --- NumPy engine ---
+
+
+def test_numpy_engine_permutation():
+    """engine='numpy' orders the sorted files by numpy.random.default_rng(seed).permutation."""
+    np = pytest.importorskip("numpy")
+
+    from splitfolders import setup_files
+
+    class_dir = pathlib.Path(os.path.dirname(__file__), "imgs", "cats")
+    files = setup_files(class_dir, 42, engine="numpy")
+
+    expected = sorted(class_dir.iterdir())
+    assert list(files) == [expected[i] for i in np.random.default_rng(42).permutation(len(expected))]
+
+
+def test_numpy_engine_split():
+    pytest.importorskip("numpy")
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs_texts")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+    output_dir2 = os.path.join(os.path.dirname(__file__), "output2")
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+    result = kfold(input_dir, output_dir, k=2, group="stem", move=False, engine="numpy")
+    kfold(input_dir, output_dir2, k=2, group="stem", move=False, engine="numpy", workers=2)
+
+    assert _split_layout(output_dir) == _split_layout(output_dir2)
+    assert len(result) == 2 * len(list(pathlib.Path(input_dir).rglob("*.*")))
+
+    shutil.rmtree(output_dir2, ignore_errors=True)
+
+
+def test_invalid_engine():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="engine"):
+        ratio(input_dir, output_dir, engine="gpu")
+
+
+# --- Resumable splits ---
+
+
+def _crash_after(monkeypatch, n):
+    """Makes the transfer of the (n + 1)-th file fail, like a killed process"""
+    import splitfolders.transfer
+
+    transfer_file = splitfolders.transfer._transfer_file
+    calls = []
+
+    def crashing(*args, **kwargs):
+        calls.append(args)
+        if len(calls) > n:
+            raise OSError("killed")
+        return transfer_file(*args, **kwargs)
+
+    monkeypatch.setattr(splitfolders.transfer, "_transfer_file", crashing)
+
+
+def test_ratio_resume(tmp_path, monkeypatch):
+    from splitfolders.journal import JOURNAL_FILE, load_journal
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 8)
+        with pytest.raises(OSError, match="killed"):
+            ratio(input_dir, output_dir, resume=True)
+    settings, entries, done = load_journal(output_dir)
+    assert settings["split"] == "ratio"
+    assert len(entries) == 20
+    assert len(done) == 8
+
+    # a file cut off by the crash is copied again
+    partial = next(e.destination for e in entries if str(e.destination) not in done)
+    partial.write_bytes(b"partial")
+
+    stats = []
+    result = ratio(input_dir, output_dir, resume=True, metrics=stats.append)
+    assert len(result) == 12
+    assert stats[0].skipped["resumed"] == 8
+    assert partial.read_bytes() != b"partial"
+    assert not (output_dir / JOURNAL_FILE).exists()
+
+    expected = tmp_path / "expected"
+    ratio(input_dir, expected)
+    assert sorted(f.relative_to(output_dir) for f in output_dir.rglob("*.jpg")) == sorted(
+        f.relative_to(expected) for f in expected.rglob("*.jpg")
+    )
+
+
+def test_ratio_resume_move(tmp_path, monkeypatch):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs"), input_dir)
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 5)
+        with pytest.raises(OSError, match="killed"):
+            ratio(input_dir, output_dir, move=True, resume=True, workers=2)
+
+    # the plan comes from the journal, not from the half-moved input
+    ratio(input_dir, output_dir, move=True, resume=True)
+    assert len(list(input_dir.rglob("*.jpg"))) == 0
+    assert len(list(output_dir.rglob("*.jpg"))) == 20
+
+
+def test_fixed_and_kfold_resume(tmp_path, monkeypatch):
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 3)
+        with pytest.raises(OSError):
+            fixed(input_dir, tmp_path / "fixed", fixed=(2, 2), resume=True)
+    fixed(input_dir, tmp_path / "fixed", fixed=(2, 2), resume=True)
+    assert len(list((tmp_path / "fixed" / "val").rglob("*.jpg"))) == 4
+    assert len(list((tmp_path / "fixed").rglob("*.jpg"))) == 20
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 3)
+        with pytest.raises(OSError):
+            kfold(input_dir, tmp_path / "kfold", k=2, fold_store="symlink", resume=True)
+    kfold(input_dir, tmp_path / "kfold", k=2, fold_store="symlink", resume=True)
+    assert len(list((tmp_path / "kfold" / "folds").rglob("*.jpg"))) == 20
+    assert len(list((tmp_path / "kfold").glob("fold_*/*/*/*.jpg"))) == 40
+
+
+def test_resume_errors(tmp_path, monkeypatch):
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+
+    with monkeypatch.context() as m:
+        _crash_after(m, 3)
+        with pytest.raises(OSError):
+            ratio(input_dir, output_dir, resume=True)
+    with pytest.raises(ValueError, match="different settings"):
+        ratio(input_dir, output_dir, seed=42, resume=True)
+    with pytest.raises(ValueError, match="different settings"):
+        ratio(input_dir, output_dir, shuffle=False, resume=True)
+
+    with pytest.raises(ValueError, match="dry_run"):
+        ratio(input_dir, output_dir, resume=True, dry_run=True)
+    with pytest.raises(ValueError, match="incremental"):
+        ratio(input_dir, output_dir, resume=True, incremental=True)
+    with pytest.raises(ValueError, match="oversample"):
+        fixed(input_dir, output_dir, fixed=2, oversample=True, resume=True)
+
+
+# --- Overwrite policy ---
+
+
+def test_ratio_overwrite_if_changed(tmp_path):
+    input_dir = tmp_path / "input"
+    output_dir = tmp_path / "output"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs"), input_dir)
+
+    ratio(input_dir, output_dir)
+    changed = input_dir / "cats" / "andrew-umansky-714774-unsplash.jpg"
+    changed.write_bytes(b"changed")
+
+    stats = []
+    ratio(input_dir, output_dir, overwrite="if-changed", metrics=stats.append)
+    assert stats[0].skipped["identical"] == 19
+    assert [f.read_bytes() for f in output_dir.rglob(changed.name)] == [b"changed"]
+
+    # same size and modification time, different content
+    os.utime(changed, ns=(0, 0))
+    changed.write_bytes(b"CHANGED")
+    for f in output_dir.rglob(changed.name):
+        os.utime(f, ns=(0, os.stat(changed).st_mtime_ns))
+
+    ratio(input_dir, output_dir, overwrite="if-changed", metrics=stats.append)
+    assert stats[1].skipped["identical"] == 20
+    ratio(input_dir, output_dir, overwrite="if-changed-hash", metrics=stats.append)
+    assert stats[2].skipped["identical"] == 19
+    assert [f.read_bytes() for f in output_dir.rglob(changed.name)] == [b"CHANGED"]
+
+
+def test_overwrite_invalid():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="overwrite"):
+        ratio(input_dir, output_dir, overwrite="never")
+
+
+# --- Archive sinks ---
+
+
+def test_ratio_sink_tar(tmp_path):
+    import tarfile
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+
+    result = ratio(input_dir, output_dir, ratio=(0.5, 0.5), sink="tar", details=True)
+    assert sorted(p.name for p in output_dir.iterdir()) == ["train-000000.tar", "val-000000.tar"]
+    assert len(result) == 20
+
+    members = set()
+    for split in ("train", "val"):
+        with tarfile.open(output_dir / f"{split}-000000.tar") as tar:
+            members |= {f"{split}/{m.name}" for m in tar.getmembers()}
+            assert all(m.isfile() and m.size > 0 for m in tar.getmembers())
+
+    # same assignment as a split into folders
+    expected = tmp_path / "expected"
+    ratio(input_dir, expected, ratio=(0.5, 0.5))
+    assert members == {f.relative_to(expected).as_posix() for f in expected.rglob("*.jpg")}
+
+
+def test_ratio_sink_zip_shards(tmp_path):
+    import zipfile
+
+    from splitfolders import ArchiveSink
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+    max_size = 4000
+
+    ratio(input_dir, output_dir, ratio=(0.5, 0.5), sink=ArchiveSink("zip", max_size=max_size, per_class=True))
+    shards = sorted(output_dir.glob("*/*.zip"))
+    assert {p.parent.name for p in shards} == {"train", "val"}
+    assert {p.name.split("-")[0] for p in shards} == {"cats", "dogs"}
+    assert len(shards) > 4
+    assert not list(output_dir.rglob("*.tmp"))
+
+    names = []
+    for shard in shards:
+        with zipfile.ZipFile(shard) as z:
+            infos = z.infolist()
+            names += [i.filename for i in infos]
+            assert len(infos) == 1 or sum(i.file_size for i in infos) <= max_size
+    assert len(names) == 20
+    assert all("/" not in name for name in names)
+
+
+def test_fixed_and_kfold_sink(tmp_path):
+    import tarfile
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+
+    # duplicates are read from the input, there is no train folder to copy them from
+    result = fixed(input_dir, tmp_path / "fixed", fixed=(2, 2), oversample=True, sink="tar")
+    with tarfile.open(tmp_path / "fixed" / "train-000000.tar") as tar:
+        names = tar.getnames()
+    assert len(names) == result.splits()["train"] == 14
+    assert len([n for n in names if n.startswith("cats/")]) == len([n for n in names if n.startswith("dogs/")])
+
+    kfold(input_dir, tmp_path / "kfold", k=2, move=False, sink="tar")
+    assert sorted(p.relative_to(tmp_path / "kfold").as_posix() for p in (tmp_path / "kfold").rglob("*.tar")) == [
+        "fold_1/train-000000.tar",
+        "fold_1/val-000000.tar",
+        "fold_2/train-000000.tar",
+        "fold_2/val-000000.tar",
+    ]
+
+
+def test_sink_errors(tmp_path):
+    from splitfolders import ArchiveSink
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = tmp_path / "output"
+
+    with pytest.raises(ValueError, match="sink"):
+        ratio(input_dir, output_dir, sink="7z")
+    with pytest.raises(ValueError, match="format"):
+        ArchiveSink("rar")
+    with pytest.raises(ValueError, match="move=False"):
+        ratio(input_dir, output_dir, sink="tar", move=True)
+    with pytest.raises(ValueError, match="move=False"):
+        kfold(input_dir, output_dir, sink="tar")
+    with pytest.raises(ValueError, match="dry_run"):
+        ratio(input_dir, output_dir, sink="tar", dry_run=True)
+    with pytest.raises(ValueError, match="fold_store"):
+        kfold(input_dir, output_dir, move=False, sink="tar", fold_store="symlink")
+
+
+# --- Archive inputs ---
+
+
+def test_ratio_archive_input(tmp_path):
+    """A tar or zip is split like the folder it extracts to, also with a single wrapping folder."""
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    shutil.copytree(input_dir, tmp_path / "dataset")
+    wrapped = shutil.make_archive(tmp_path / "wrapped", "gztar", tmp_path, "dataset")
+    flat = shutil.make_archive(tmp_path / "flat", "zip", input_dir)
+
+    expected = tmp_path / "expected"
+    ratio(input_dir, expected)
+    expected_files = sorted(f.relative_to(expected) for f in expected.rglob("*.jpg"))
+
+    for archive in (wrapped, flat):
+        output_dir = tmp_path / pathlib.Path(archive).stem
+        result = ratio(archive, output_dir)
+        assert len(result) == 20
+        assert sorted(f.relative_to(output_dir) for f in output_dir.rglob("*.jpg")) == expected_files
+        assert all((output_dir / f).read_bytes() == (expected / f).read_bytes() for f in expected_files)
+
+    plan = ratio(flat, tmp_path / "plan", dry_run=True)
+    assert all(pathlib.Path(flat) in e.source.parents for e in plan)
+    assert not (tmp_path / "plan").exists()
+
+
+def test_kfold_archive_input_sibling_sink(tmp_path):
+    """Sibling groups end up in one shard, even though their files are apart in the archive."""
+    import tarfile
+
+    from splitfolders import ArchiveSink
+
+    input_dir = tmp_path / "input"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs_sibling"), input_dir)
+    for f in input_dir.rglob("*.*"):
+        f.write_bytes(b"x" * 100)
+    archive = shutil.make_archive(tmp_path / "sibling", "tar", input_dir)
+    output_dir = tmp_path / "output"
+
+    result = kfold(archive, output_dir, k=2, group="sibling", move=False, sink=ArchiveSink("tar", max_size=200))
+    shards = sorted(output_dir.rglob("*.tar"))
+    # 5 groups of an image and an annotation, each group is in one train and one val split
+    assert len(result) == 20
+    assert len(shards) == 10
+    for shard in shards:
+        with tarfile.open(shard) as tar:
+            names = tar.getnames()
+        # one group per shard: the same stem in each type dir
+        assert len({pathlib.Path(n).stem for n in names}) == 1
+        assert len(names) == len({pathlib.Path(n).parent for n in names}) > 1
+
+
+def test_archive_input_errors(tmp_path):
+    archive = shutil.make_archive(tmp_path / "imgs", "zip", os.path.join(os.path.dirname(__file__), "imgs"))
+    output_dir = tmp_path / "output"
+
+    with pytest.raises(ValueError, match="move=False"):
+        ratio(archive, output_dir, move=True)
+    with pytest.raises(ValueError, match="move=False"):
+        kfold(archive, output_dir)
+    with pytest.raises(ValueError, match="incremental"):
+        ratio(archive, output_dir, incremental=True)
+    with pytest.raises(ValueError, match="oversample=True"):
+        fixed(archive, output_dir, fixed=2, oversample="hardlink")
+    with pytest.raises(ValueError, match="workers"):
+        ratio(archive, output_dir, workers=4)
+    with pytest.raises(ValueError, match="overwrite_hash"):
+        ratio(archive, output_dir, overwrite="if-changed-hash")
+
+
+def test_archive_input_if_changed(tmp_path):
+    """Rerunning with overwrite="if-changed" skips the files extracted by the first run."""
+    archive = shutil.make_archive(tmp_path / "imgs", "gztar", os.path.join(os.path.dirname(__file__), "imgs"))
+    output_dir = tmp_path / "output"
+
+    ratio(archive, output_dir)
+    changed = next(output_dir.rglob("*.jpg"))
+    changed.write_bytes(b"changed")
+
+    stats = []
+    ratio(archive, output_dir, overwrite="if-changed", metrics=stats.append)
+    assert stats[0].skipped["identical"] == 19
+    assert changed.read_bytes() != b"changed"
+
+
+# --- Filesystems ---
+
+
+def _memory_fs(input_dir, root="input", fs=None):
+    """A MemoryFS (or `fs`) with a copy of `input_dir` at `root`"""
+    from splitfolders import MemoryFS
+
+    fs = MemoryFS() if fs is None else fs
+    for f in pathlib.Path(input_dir).rglob("*"):
+        if f.is_file():
+            fs.write_file(pathlib.Path(root) / f.relative_to(input_dir), f.read_bytes(), f.stat().st_mtime)
+    return fs
+
+
+def _memory_files(fs, directory):
+    dirs, names = fs.scan(directory)
+    files = [pathlib.Path(directory) / n for n in names]
+    for d in dirs:
+        files += _memory_files(fs, d)
+    return files
+
+
+def test_memory_fs_same_split(tmp_path):
+    """A split in memory lands like the split on disk, without touching the disk."""
+    for name, split, options in [
+        ("imgs", ratio, {}),
+        ("imgs", fixed, {"fixed": (2, 2), "oversample": True}),
+        ("imgs", kfold, {"k": 3, "workers": 4}),
+        ("imgs_sibling", ratio, {"group": "sibling", "executor": "async", "workers": 2}),
+        ("imgs_texts", ratio, {"group": "stem", "move": True}),
+    ]:
+        input_dir = os.path.join(os.path.dirname(__file__), name)
+        fs = _memory_fs(input_dir)
+        output_dir = tmp_path / name / split.__name__
+        result = split("input", output_dir, fs=fs, **options)
+        assert not output_dir.exists()
+
+        options.pop("move", None)
+        split(input_dir, output_dir, **options)
+        on_disk = sorted(f.relative_to(output_dir) for f in output_dir.rglob("*") if not f.is_dir())
+        in_memory = sorted(f.relative_to(output_dir) for f in _memory_files(fs, output_dir))
+        assert in_memory == on_disk
+        assert len(result) == len(on_disk)
+
+
+def test_memory_fs_modes():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+
+    fs = _memory_fs(input_dir)
+    kfold("input", "output", k=2, fs=fs)
+    assert all(fs.is_link(f) for f in _memory_files(fs, "output"))
+    f = _memory_files(fs, "output/fold_1/val/cats")[0]
+    assert fs.read_file(f) == fs.read_file(pathlib.Path("input/cats") / f.name)
+
+    fs = _memory_fs(input_dir)
+    ratio("input", "output", move=True, fs=fs)
+    assert _memory_files(fs, "input") == []
+    assert len(_memory_files(fs, "output")) == 20
+
+    fs = _memory_fs(input_dir)
+    fixed("input", "output", fixed=2, oversample="manifest", fs=fs)
+    assert fs.read_file("output/oversample.csv").startswith(b"path,label,weight")
+
+    # a rerun skips the identical copies
+    fs = _memory_fs(input_dir)
+    ratio("input", "output", fs=fs)
+    stats = []
+    ratio("input", "output", overwrite="if-changed-hash", fs=fs, metrics=stats.append)
+    assert stats[0].skipped["identical"] == 20
+
+
+def test_fs_errors(tmp_path):
+    from splitfolders import LocalFS
+
+    fs = _memory_fs(os.path.join(os.path.dirname(__file__), "imgs"))
+    with pytest.raises(ValueError, match="does not exists"):
+        ratio("missing", "output", fs=fs)
+    with pytest.raises(ValueError, match="resume"):
+        fixed("input", "output", resume=True, fs=fs)
+    with pytest.raises(ValueError, match="incremental"):
+        ratio("input", "output", incremental=True, fs=fs)
+    with pytest.raises(ValueError, match="sink"):
+        kfold("input", "output", move=False, sink="tar", fs=fs)
+    with pytest.raises(ValueError, match="executor='thread'"):
+        ratio("input", "output", workers=2, executor="process", fs=fs)
+
+    # the local disk also works with worker processes
+    output_dir = tmp_path / "output"
+    ratio(os.path.join(os.path.dirname(__file__), "imgs"), output_dir, workers=2, executor="process", fs=LocalFS())
+    assert len(list(output_dir.rglob("*.jpg"))) == 20
+
+
+# --- Output directories ---
+
+
+def test_output_dirs_created_once():
+    """All output folders are created up front, once each, and none while copying."""
+    from splitfolders import MemoryFS
+
+    class CountingFS(MemoryFS):
+        def mkdir(self, path):
+            self.made.append(pathlib.Path(path))
+            super().mkdir(path)
+
+    for name, split, options, expected in [
+        ("imgs", ratio, {}, 3 * 2),
+        ("imgs", fixed, {"fixed": (2, 2), "oversample": True}, 3 * 2),
+        ("imgs", kfold, {"k": 3, "workers": 4}, 3 * 2 * 2),
+        ("imgs_flat", ratio, {"assignment": "hash", "stream": True}, 3),
+        # 5 groups: 4 in train, 1 in val and none in test, which gets no folders
+        ("imgs_sibling", ratio, {"group": "sibling", "ratio": (0.8, 0.2, 0.0)}, 2 * 2),
+    ]:
+        fs = CountingFS()
+        fs.made = []
+        _memory_fs(os.path.join(os.path.dirname(__file__), name), fs=fs)
+        fs.made.clear()
+        result = split("input", "output", fs=fs, **options)
+        assert len(fs.made) == len(set(fs.made)) == expected
+        assert len(result) > 0
+
+
+# --- Copy metadata ---
+
+
+def test_ratio_preserve_metadata(tmp_path):
+    input_dir = tmp_path / "input"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), "imgs"), input_dir)
+    for f in input_dir.rglob("*.jpg"):
+        os.chmod(f, 0o600)
+        os.utime(f, (1000, 2000))
+
+    for preserve_metadata in ("none", "times", "full"):
+        output_dir = tmp_path / preserve_metadata
+        ratio(input_dir, output_dir, preserve_metadata=preserve_metadata)
+        for f in output_dir.rglob("*.jpg"):
+            src = input_dir / f.parent.name / f.name
+            assert f.read_bytes() == src.read_bytes()
+            assert (f.stat().st_mtime == 2000) == (preserve_metadata != "none")
+            if os.name == "posix":
+                assert (f.stat().st_mode & 0o777 == 0o600) == (preserve_metadata == "full")
+
+
+@pytest.mark.skipif(not hasattr(os, "copy_file_range"), reason="copy_file_range is Linux only")
+def test_copy_fallbacks(tmp_path, monkeypatch):
+    """Files are copied with sendfile or read/write where copy_file_range (or sendfile) does not work."""
+    import errno
+
+    from splitfolders.fs import _copy_file
+
+    src = tmp_path / "src"
+    src.write_bytes(os.urandom(100_000))
+
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "unsupported")
+
+    monkeypatch.setattr(os, "copy_file_range", unsupported)
+    _copy_file(src, tmp_path / "sendfile")
+    monkeypatch.setattr(os, "sendfile", unsupported)
+    _copy_file(src, tmp_path / "read")
+    assert (tmp_path / "sendfile").read_bytes() == (tmp_path / "read").read_bytes() == src.read_bytes()
+
+    # a symlink to the source (e.g. from an earlier split) is not copied onto itself
+    (tmp_path / "link").symlink_to(src)
+    with pytest.raises(shutil.SameFileError):
+        _copy_file(src, tmp_path / "link")
+    assert src.stat().st_size == 100_000
+
+
+def test_preserve_metadata_invalid():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="preserve_metadata"):
+        ratio(input_dir, output_dir, preserve_metadata="some")
+    with pytest.raises(ValueError, match="modification times"):
+        fixed(input_dir, output_dir, overwrite="if-changed", preserve_metadata="none")
+
+
+# --- Sharding ---
+
+
+def _tree(directory):
+    return sorted(str(p.relative_to(directory)) + ("/" if p.is_dir() else "") for p in directory.rglob("*"))
+
+
+def test_shards_cover_the_split(tmp_path):
+    """The shards plan disjoint parts of the split, together they write the unsharded output."""
+    import tarfile
+
+    with tarfile.open(tmp_path / "imgs.tar", "w") as tar:
+        tar.add(os.path.join(os.path.dirname(__file__), "imgs"), "imgs")
+
+    for name, split, options in [
+        ("imgs", ratio, {}),
+        ("imgs", fixed, {"fixed": (2, 2), "oversample": True}),
+        ("imgs", kfold, {"k": 3, "move": False}),
+        ("imgs", kfold, {"k": 3, "fold_store": "symlink"}),
+        ("imgs_sibling", ratio, {"group": "sibling"}),
+        ("imgs_flat", kfold, {"k": 2, "move": False}),
+        ("imgs.tar", fixed, {"fixed": (2, 2), "oversample": True, "shard_by": "bytes"}),
+    ]:
+        input_dir = tmp_path / name if name.endswith(".tar") else os.path.join(os.path.dirname(__file__), name)
+        output_dir = tmp_path / "sharded" / name / f"{split.__name__}_{len(options)}"
+        expected = tmp_path / "expected" / name / output_dir.name
+        full = split(input_dir, expected, dry_run=True, **options)
+        split(input_dir, expected, **options)
+
+        planned = []
+        for shard_index in range(3):
+            plan = split(input_dir, output_dir, dry_run=True, num_shards=3, shard_index=shard_index, **options)
+            planned += [pathlib.Path(e.destination).relative_to(output_dir) for e in plan]
+            split(input_dir, output_dir, num_shards=3, shard_index=shard_index, **options)
+        assert sorted(planned) == sorted(pathlib.Path(e.destination).relative_to(expected) for e in full)
+        assert len(set(planned)) == len(planned)
+        assert _tree(output_dir) == _tree(expected)
+
+
+def test_shards_balanced(tmp_path):
+    from splitfolders import MemoryFS
+
+    fs = MemoryFS()
+    sizes = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+    for i, size in enumerate(sizes):
+        fs.write_file(f"input/{'ab'[i % 2]}/{i}.txt", b"x" * size)
+
+    counts, loads = [], []
+    for shard_index in range(3):
+        counts.append(len(ratio("input", "count", num_shards=3, shard_index=shard_index, fs=fs)))
+        result = ratio("input", "bytes", num_shards=3, shard_index=shard_index, shard_by="bytes", details=True, fs=fs)
+        loads.append(sum(result.splits(bytes=True).values()))
+    assert counts == [4, 4, 4]
+    assert sum(loads) == sum(sizes)
+    assert max(loads) - min(loads) <= max(sizes)
+
+    # groups of files stay in one shard
+    for i in range(len(sizes)):
+        fs.write_file(f"input/{'ab'[i % 2]}/{i}.json", b"{}")
+    for shard_index in range(2):
+        result = ratio("input", "grouped", group="stem", num_shards=2, shard_index=shard_index, details=True, fs=fs)
+        stems = sorted(p.stem for paths in result.destinations.values() for p in paths)
+        assert stems[::2] == stems[1::2]
+
+
+def test_shards_invalid():
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    output_dir = os.path.join(os.path.dirname(__file__), "output")
+
+    with pytest.raises(ValueError, match="num_shards"):
+        ratio(input_dir, output_dir, num_shards=0)
+    with pytest.raises(ValueError, match="shard_index"):
+        kfold(input_dir, output_dir, num_shards=2, shard_index=2)
+    with pytest.raises(ValueError, match="shard_by"):
+        ratio(input_dir, output_dir, num_shards=2, shard_by="size")
+    with pytest.raises(ValueError, match="stream"):
+        ratio(input_dir, output_dir, assignment="hash", stream=True, num_shards=2)
+    with pytest.raises(ValueError, match="oversample_manifest"):
+        fixed(input_dir, output_dir, fixed=2, oversample="manifest", num_shards=2)
+    with pytest.raises(ValueError, match="sink"):
+        kfold(input_dir, output_dir, move=False, sink="tar", num_shards=2)
+    # every run lists the input, moves of one shard would change the split of the others
+    with pytest.raises(ValueError, match="move"):
+        ratio(input_dir, output_dir, move=True, num_shards=2)
+    with pytest.raises(ValueError, match="move"):
+        fixed(input_dir, output_dir, fixed=2, move="move", num_shards=2, shard_index=1)
+
+
+# --- File list inputs ---
+
+
+def test_file_list_same_split(tmp_path):
+    """A list of the files with their labels is split like the folder, from memory, CSV or JSONL."""
+    import csv
+    import json
+
+    input_dir = pathlib.Path(os.path.dirname(__file__)) / "imgs"
+    records = [(str(f), f.parent.name) for f in sorted(input_dir.rglob("*.jpg"))]
+    with open(tmp_path / "files.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["path", "label"])
+        writer.writerows(records)
+    with open(tmp_path / "files.jsonl", "w") as f:
+        f.writelines(json.dumps({"path": path, "label": label}) + "\n" for path, label in records)
+
+    for split, options in [
+        (ratio, {}),
+        (ratio, {"assignment": "hash"}),
+        (fixed, {"fixed": (2, 2), "oversample": True, "move": "hardlink"}),
+        (fixed, {"fixed": (2, 2), "oversample": True, "move": False, "sink": "tar"}),
+        (kfold, {"k": 3}),
+        (kfold, {"k": 3, "move": False, "fold_store": "manifest"}),
+    ]:
+        expected = tmp_path / "expected" / f"{split.__name__}_{len(options)}"
+        expected_result = split(input_dir, expected, **options)
+        for name, file_list in [
+            ("list", records),
+            ("csv", tmp_path / "files.csv"),
+            ("jsonl", tmp_path / "files.jsonl"),
+        ]:
+            output_dir = tmp_path / name / expected.name
+            result = split(file_list, output_dir, **options)
+            assert _tree(output_dir) == _tree(expected)
+            assert result.files == expected_result.files
+
+    # the plan lists the files, not the folders of the list
+    plan = ratio(records, tmp_path / "plan", dry_run=True)
+    assert sorted(str(e.source) for e in plan) == sorted(path for path, _ in records)
+
+
+def test_file_list_groups(tmp_path):
+    from splitfolders import FileListInput
+
+    input_dir = pathlib.Path(os.path.dirname(__file__)) / "imgs"
+    files = sorted(input_dir.rglob("*.jpg"))
+
+    # without labels the list is split like a flat folder, groups stay together
+    records = [{"path": str(f), "group": i // 2} for i, f in enumerate(files)]
+    result = ratio(records, tmp_path / "flat", ratio=(0.5, 0.5), details=True)
+    assert set(result.splits()) == {"train", "val"}
+    splits = {p.name: split for (split, _), paths in result.destinations.items() for p in paths}
+    assert all(splits[files[i].name] == splits[files[i + 1].name] for i in range(0, len(files), 2))
+
+    file_list = FileListInput(records)
+    assert file_list.groups
+    assert file_list.scan(file_list.root)[0] == []
+    with pytest.raises(ValueError, match="has groups"):
+        ratio(file_list, tmp_path / "grouped", group="stem")
+
+
+def test_file_list_invalid(tmp_path):
+    from splitfolders import FileListInput
+
+    input_dir = pathlib.Path(os.path.dirname(__file__)) / "imgs"
+    records = [(str(f), f.parent.name) for f in sorted(input_dir.rglob("*.jpg"))]
+
+    with pytest.raises(ValueError, match="same name"):
+        FileListInput(records + records[:1])
+    with pytest.raises(ValueError, match="all or no files"):
+        FileListInput(records + [str(input_dir / "cats" / "x.jpg")])
+    with pytest.raises(ValueError, match="folder names"):
+        FileListInput([(records[0][0], "cats/small")])
+    with pytest.raises(ValueError, match="need a `path`"):
+        FileListInput([{"label": "cats"}])
+    with pytest.raises(ValueError, match="incremental"):
+        ratio(records, tmp_path, incremental=True)
+    with pytest.raises(ValueError, match="oversample_manifest"):
+        fixed(records, tmp_path, fixed=2, oversample="manifest")
+    with pytest.raises(ValueError, match="resume"):
+        kfold(records, tmp_path, resume=True)
+
+
+# --- Scan cache ---
+
+
+def _old_input(tmp_path, name="imgs"):
+    """A copy of a test input, last modified long ago"""
+    input_dir = tmp_path / "input"
+    shutil.copytree(os.path.join(os.path.dirname(__file__), name), input_dir)
+    for d in [input_dir, *input_dir.iterdir()]:
+        os.utime(d, (1_000_000_000, 1_000_000_000))
+    return input_dir
+
+
+def test_scan_cache_rescans_changed_dirs(tmp_path):
+    """Unchanged folders are listed from the cache, changed ones are scanned again."""
+    import json
+
+    from splitfolders import ScanCache
+
+    input_dir = _old_input(tmp_path)
+    cache_path = tmp_path / "scan.json"
+    ratio(input_dir, tmp_path / "expected")
+
+    cache = ScanCache(cache_path)
+    ratio(input_dir, tmp_path / "first", scan_cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache = ScanCache(cache_path)
+    ratio(input_dir, tmp_path / "second", scan_cache=cache)
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert _tree(tmp_path / "first") == _tree(tmp_path / "second") == _tree(tmp_path / "expected")
+
+    # a file is added to one class
+    (input_dir / "cats" / "new.jpg").write_bytes(b"")
+    os.utime(input_dir / "cats", (1_000_000_001, 1_000_000_001))
+    cache = ScanCache(cache_path)
+    result = fixed(input_dir, tmp_path / "third", fixed=2, oversample=True, scan_cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert result.labels()["cats"] == 12
+
+    # listings of removed folders are dropped
+    shutil.rmtree(input_dir / "dogs")
+    os.utime(input_dir, (1_000_000_001, 1_000_000_001))
+    kfold(input_dir, tmp_path / "fourth", k=2, scan_cache=cache_path)
+    with open(cache_path) as f:
+        assert sorted(pathlib.Path(d).name for d in json.load(f)["dirs"]) == ["cats", "input"]
+
+
+def test_scan_cache_location(tmp_path, monkeypatch):
+    import sys
+
+    from splitfolders import ScanCache
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "cache"))
+    input_dir = _old_input(tmp_path)
+    ratio(input_dir, tmp_path / "output", scan_cache=True)
+    if sys.platform != "darwin":
+        assert len(list((tmp_path / "cache" / "splitfolders").glob("scan-*.json"))) == 1
+
+    # folders modified just now are not cached, a file added in the same tick would go unnoticed
+    os.utime(input_dir / "cats")
+    cache = ScanCache(tmp_path / "scan.json")
+    ratio(input_dir, tmp_path / "output", scan_cache=cache)
+    cache = ScanCache(tmp_path / "scan.json")
+    ratio(input_dir, tmp_path / "output", scan_cache=cache)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_scan_cache_invalid(tmp_path):
+    from splitfolders import MemoryFS
+
+    input_dir = os.path.join(os.path.dirname(__file__), "imgs")
+    records = [(str(f), f.parent.name) for f in pathlib.Path(input_dir).rglob("*.jpg")]
+
+    with pytest.raises(ValueError, match="stream"):
+        ratio(input_dir, tmp_path, assignment="hash", stream=True, scan_cache=tmp_path / "scan.json")
+    with pytest.raises(ValueError, match="scan_cache"):
+        ratio("input", tmp_path, fs=MemoryFS(), scan_cache=True)
+    with pytest.raises(ValueError, match="scan_cache"):
+        kfold(records, tmp_path, scan_cache=True)
+
+
+# --- Benchmarks ---
+
+
+def test_benchmark_case():
+    """The benchmarks run on a tiny synthetic dataset and report all measurements."""
+    from benchmarks.bench import run_case
+
+    result = run_case("stem_pairs", "kfold", "hardlink", scale=0.001)
+
+    assert result["files"] == 10 * 4 * 2
+    assert result["files_per_sec"] > 0
+    assert set(result["phases"]) == {"scan", "group", "shuffle", "copy"}
+
+    result = run_case("flat", "ratio", "copy", scale=0.001, fs="memory")
+    assert result["files"] == 20
+    assert result["fs"] == "memory"